@@ -0,0 +1,393 @@
+"""local stand-in for the Harmonic consumer API, for benchmarks and offline runs
+
+python -m benchmarks.mock_server --port 8080 --latency 0.02 --error-rate 0.01
+
+then point a client at it with client._set_api_endpoint("http://127.0.0.1:8080").
+Records are generated from their id, so every run serves the same data.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+COUNTRIES = ("United States", "United Kingdom", "France", "Germany", "Canada", "India")
+FUNDING_STAGES = ("PRE_SEED", "SEED", "SERIES_A", "SERIES_B", "SERIES_C", "EXITED")
+PEOPLE_PER_COMPANY = 3
+
+_ENTITY_PATH = re.compile(r"^/(companies|persons)/(?P<id>[^/]+)$")
+_WATCHLIST_PATH = re.compile(r"^/watchlists/companies/(?P<id>[^/:]+)(?::(?P<action>\w+))?$")
+_SAVED_SEARCH_PATH = re.compile(r"^/saved_searches:results/(?P<id>[^/]+)$")
+
+
+def entity_id(id_or_urn):
+    """numeric id of an id, a URN or an enrichment URL"""
+    match = re.search(r"(\d+)/?$", str(id_or_urn))
+    return int(match.group(1)) if match else zlib.crc32(str(id_or_urn).encode()) % 10**9
+
+
+@lru_cache(maxsize=100000)
+def company(id, payload_bytes=2000):
+    record = {
+        "id": id,
+        "entity_urn": f"urn:harmonic:company:{id}",
+        "name": f"Company {id}",
+        "website": {"url": f"https://company{id}.com", "domain": f"company{id}.com"},
+        "socials": {
+            "LINKEDIN": {"url": f"https://linkedin.com/company/company{id}"},
+        },
+        "headcount": id % 5000,
+        "stage": FUNDING_STAGES[id % len(FUNDING_STAGES)],
+        "funding": {
+            "funding_stage": FUNDING_STAGES[id % len(FUNDING_STAGES)],
+            "funding_total": float(id % 1000) * 100000,
+            "investors": [{"name": f"Investor {id % 97}"}],
+        },
+        "location": {"country": COUNTRIES[id % len(COUNTRIES)]},
+        "people": [
+            {"person": f"urn:harmonic:person:{id * PEOPLE_PER_COMPANY + i}", "title": "Founder"}
+            for i in range(PEOPLE_PER_COMPANY)
+        ],
+    }
+    return _padded(record, payload_bytes)
+
+
+@lru_cache(maxsize=100000)
+def person(id, payload_bytes=1000):
+    record = {
+        "id": id,
+        "entity_urn": f"urn:harmonic:person:{id}",
+        "full_name": f"Person {id}",
+        "socials": {"LINKEDIN": {"url": f"https://linkedin.com/in/person{id}"}},
+        "location": {"country": COUNTRIES[id % len(COUNTRIES)]},
+    }
+    return _padded(record, payload_bytes)
+
+
+def _padded(record, payload_bytes):
+    # a description fills the record up to roughly payload_bytes of JSON
+    size = len(json.dumps(record))
+    record["description"] = "x" * max(0, payload_bytes - size - 20)
+    return record
+
+
+class MockHarmonicServer:
+    """threaded HTTP server answering like the Harmonic API
+
+    with MockHarmonicServer(latency=0.01, rate_limit_rate=0.05) as server:
+        client._set_api_endpoint(server.url)
+
+    latency, jitter: seconds added to every response
+    results: number of results of every saved search and search
+    max_page_size: cap on the page size of saved search results
+    company_bytes, person_bytes: approximate JSON size of a record
+    rate_limit_rate, error_rate: share of requests answered with 429 / 500
+    truncate_rate: share of saved search pages cut off in the middle of the body
+    retry_after: Retry-After header of the 429s, in seconds
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        results=1000,
+        max_page_size=1000,
+        company_bytes=2000,
+        person_bytes=1000,
+        rate_limit_rate=0.0,
+        error_rate=0.0,
+        truncate_rate=0.0,
+        retry_after=None,
+        watchlists=3,
+        seed=0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.results = results
+        self.max_page_size = max_page_size
+        self.company_bytes = company_bytes
+        self.person_bytes = person_bytes
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.watchlists = {
+            str(i): {
+                "id": i,
+                "entity_urn": f"urn:harmonic:company_watchlist:{i}",
+                "name": f"Watchlist {i}",
+                "shared_with_team": False,
+                "companies": [f"urn:harmonic:company:{j}" for j in range(i * 10, i * 10 + 10)],
+            }
+            for i in range(1, watchlists + 1)
+        }
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            return self._random.random(), self._random.random()
+
+    def _delay(self, jitter_draw):
+        delay = self.latency + self.jitter * jitter_draw
+        if delay > 0:
+            time.sleep(delay)
+
+    def _company(self, id_or_urn):
+        return company(entity_id(id_or_urn), self.company_bytes)
+
+    def _person(self, id_or_urn):
+        return person(entity_id(id_or_urn), self.person_bytes)
+
+    def _watchlist(self, watchlist):
+        return {
+            **watchlist,
+            "companies": [self._company(urn) for urn in watchlist["companies"]],
+        }
+
+    # routes, each returns (status, body) or None when nothing matches
+    def handle(self, method, path, query, body):
+        if path in ("/companies", "/persons"):
+            get = self._company if path == "/companies" else self._person
+            if method == "POST":
+                # enrichment, keyed by whichever URL was sent
+                url = next((values[0] for key, values in query.items() if key != "apikey"), "")
+                return 200, get(url)
+            ids = query.get("ids") or query.get("urns") or []
+            return 200, [get(id) for id in ids]
+
+        match = _ENTITY_PATH.match(path)
+        if match and method == "GET":
+            get = self._company if path.startswith("/companies") else self._person
+            return 200, get(match.group("id"))
+
+        match = _SAVED_SEARCH_PATH.match(path)
+        if match and method == "GET":
+            page = int(query.get("page", ["0"])[0])
+            size = min(int(query.get("size", ["100"])[0]), self.max_page_size)
+            start = page * size
+            ids = range(start, min(start + size, self.results))
+            return 200, {"count": self.results, "results": [self._company(i) for i in ids]}
+
+        if path in ("/savedSearches", "/saved_searches") and method == "GET":
+            return 200, [
+                {
+                    "id": 1,
+                    "entity_urn": "urn:harmonic:saved_search:1",
+                    "name": "Saved search 1",
+                    "type": "COMPANIES_LIST",
+                    "query": {"filter_group": {"join_operator": "and", "filters": []}},
+                }
+            ]
+
+        if path in ("/search/companies", "/search/companies_by_keywords") and method == "POST":
+            if path == "/search/companies":
+                pagination = (body.get("query") or {}).get("pagination") or {}
+                start = pagination.get("start", 0)
+                size = pagination.get("page_size", 50)
+                ids_only = False
+            else:
+                size = int(query.get("size", ["50"])[0])
+                start = int(query.get("page", ["0"])[0]) * size
+                ids_only = body.get("include_ids_only", False)
+            ids = range(start, min(start + size, self.results))
+            results = [
+                f"urn:harmonic:company:{i}" if ids_only else self._company(i) for i in ids
+            ]
+            return 200, {"count": self.results, "results": results}
+
+        if path == "/watchlists/companies" and method == "GET":
+            return 200, [
+                {k: v for k, v in watchlist.items() if k != "companies"}
+                for watchlist in self.watchlists.values()
+            ]
+
+        match = _WATCHLIST_PATH.match(path)
+        if match:
+            with self._lock:
+                watchlist = self.watchlists.get(str(entity_id(match.group("id"))))
+                if watchlist is None:
+                    return 404, {"error": "watchlist not found"}
+                action = match.group("action")
+                if method == "GET" and action is None:
+                    return 200, self._watchlist(watchlist)
+                if method == "DELETE" and action is None:
+                    del self.watchlists[str(watchlist["id"])]
+                    return 200, {"deleted": watchlist["id"]}
+                if method == "PUT" and action is None:
+                    # replaces the watchlist, a missing field is emptied
+                    watchlist["name"] = body.get("name")
+                    watchlist["shared_with_team"] = bool(body.get("shared_with_team"))
+                    watchlist["companies"] = [
+                        f"urn:harmonic:company:{entity_id(c)}" for c in body.get("companies") or ()
+                    ]
+                    return 200, self._watchlist(watchlist)
+                if method == "POST" and action in (
+                    "addCompanies",
+                    "addCompaniesByUrls",
+                    "removeCompanies",
+                ):
+                    given = body if isinstance(body, list) else body.get("urns") or body.get("ids") or []
+                    urns = [f"urn:harmonic:company:{entity_id(c)}" for c in given]
+                    if action == "removeCompanies":
+                        removed = set(urns)
+                        watchlist["companies"] = [
+                            urn for urn in watchlist["companies"] if urn not in removed
+                        ]
+                    else:
+                        members = set(watchlist["companies"])
+                        watchlist["companies"] += [urn for urn in urns if urn not in members]
+                    return 200, {"success": True}
+        return None
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        # headers and body go out in two writes, Nagle would hold the body
+        # back until the client's delayed ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            self._respond("POST")
+
+        def do_PUT(self):
+            self._respond("PUT")
+
+        def do_DELETE(self):
+            self._respond("DELETE")
+
+        def _respond(self, method):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            fault, jitter = server._draw()
+            server._delay(jitter)
+
+            if fault < server.rate_limit_rate:
+                headers = {}
+                if server.retry_after is not None:
+                    headers["Retry-After"] = str(server.retry_after)
+                return self._send(429, {"error": "Too Many Requests"}, headers)
+            if fault < server.rate_limit_rate + server.error_rate:
+                return self._send(500, {"error": "Internal Server Error"})
+
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError:
+                return self._send(400, {"error": "invalid JSON body"})
+            response = server.handle(method, parsed.path, query, body)
+            if response is None:
+                return self._send(404, {"error": f"{method} {parsed.path} not found"})
+            status, payload = response
+
+            truncate = (
+                _SAVED_SEARCH_PATH.match(parsed.path) is not None
+                and fault
+                < server.rate_limit_rate + server.error_rate + server.truncate_rate
+            )
+            self._send(status, payload, truncate=truncate)
+
+        def _send(self, status, payload, headers=None, truncate=False):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            if truncate:
+                # promise the whole body, send half of it and hang up
+                self.wfile.write(data[: len(data) // 2])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(data)
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds per response")
+    parser.add_argument("--results", type=int, default=1000, help="results of every saved search")
+    parser.add_argument("--max-page-size", type=int, default=1000)
+    parser.add_argument("--company-bytes", type=int, default=2000)
+    parser.add_argument("--person-bytes", type=int, default=1000)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500s")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="share of cut off pages")
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = MockHarmonicServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        results=args.results,
+        max_page_size=args.max_page_size,
+        company_bytes=args.company_bytes,
+        person_bytes=args.person_bytes,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        truncate_rate=args.truncate_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    # first line of output, read by benchmarks.run to find the port
+    print(server.url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""throughput, latency and memory of the SDK against benchmarks.mock_server
+
+python -m benchmarks.run
+python -m benchmarks.run --scenarios stream --records 100000 --latency 0.05
+python -m benchmarks.run --rate-limit-rate 0.02 --error-rate 0.01 --truncate-rate 0.01 --json results.json
+
+Every scenario runs in a fresh interpreter so its peak RSS is its own. The mock
+server runs in another process so it does not compete with the client for the GIL.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import subprocess
+import sys
+import time
+
+SCENARIOS = ("enrich", "batch_fetch", "stream", "stream_prefetch", "stream_adaptive", "stream_lazy")
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_scenario(name, url, options):
+    """runs one scenario in the current process, returns its report"""
+    from harmonic.api import HarmonicClient
+
+    # retries are counted in the report, not logged one by one
+    logging.getLogger("harmonic").setLevel(logging.ERROR)
+    client = HarmonicClient(
+        "benchmark",
+        pool_maxsize=max(options["workers"], 1),
+        rate_limit=options["rate"],
+        max_retries=options["max_retries"],
+    )
+    client._set_api_endpoint(url)
+    latencies = []
+    client.metrics.add_callback(
+        lambda event: event["type"] == "request" and latencies.append(event["latency"])
+    )
+    records = options["records"]
+    baseline_rss = peak_rss_mb()
+
+    start = time.perf_counter()
+    if name == "enrich":
+        urls = [f"https://linkedin.com/company/company{i}" for i in range(records)]
+        results = client.enrich_companies(urls, max_workers=options["workers"])
+        count = sum(1 for result in results if result.ok)
+    elif name == "batch_fetch":
+        companies = client.get_companies_by_ids(
+            list(range(records)), max_workers=options["workers"]
+        )
+        count = sum(1 for company in companies if company is not None)
+    else:
+        count = 0
+        for _ in client.iter_saved_search_results(
+            "urn:harmonic:saved_search:1",
+            page_size=options["page_size"],
+            prefetch=options["workers"] if name not in ("stream", "stream_lazy") else 0,
+            adaptive=name == "stream_adaptive",
+            lazy=name == "stream_lazy",
+        ):
+            count += 1
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    retries = sum(client.metrics.retries.values())
+    return {
+        "scenario": name,
+        "records": count,
+        "seconds": round(elapsed, 3),
+        "records_per_second": round(count / elapsed, 1) if elapsed else None,
+        "requests": len(latencies),
+        "retries": retries,
+        "p50_ms": _ms(percentile(latencies, 0.5)),
+        "p99_ms": _ms(percentile(latencies, 0.99)),
+        "baseline_rss_mb": round(baseline_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def start_server(args):
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.mock_server",
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--results", str(args.records),
+        "--company-bytes", str(args.company_bytes),
+        "--rate-limit-rate", str(args.rate_limit_rate),
+        "--error-rate", str(args.error_rate),
+        "--truncate-rate", str(args.truncate_rate),
+    ]
+    if args.retry_after is not None:
+        command += ["--retry-after", str(args.retry_after)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    url = server.stdout.readline().strip()
+    if not url:
+        server.kill()
+        raise RuntimeError("the mock server did not start")
+    return server, url
+
+
+def print_table(reports):
+    columns = (
+        "scenario",
+        "records",
+        "seconds",
+        "records_per_second",
+        "requests",
+        "retries",
+        "p50_ms",
+        "p99_ms",
+        "peak_rss_mb",
+    )
+    widths = [
+        max(len(column), *(len(str(report[column])) for report in reports))
+        for column in columns
+    ]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for report in reports:
+        print(
+            "  ".join(
+                str(report[column]).ljust(width) for column, width in zip(columns, widths)
+            )
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--records", type=int, default=10000, help="records per scenario")
+    parser.add_argument("--workers", type=int, default=8, help="max_workers / prefetch")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=None, help="client rate limit, requests per second")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.005, help="server seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--company-bytes", type=int, default=2000)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--json", type=str, default=None, help="also write the reports to this file")
+    args = parser.parse_args(argv)
+
+    options = {
+        "records": args.records,
+        "workers": args.workers,
+        "page_size": args.page_size,
+        "rate": args.rate,
+        "max_retries": args.max_retries,
+    }
+    server, url = start_server(args)
+    reports = []
+    try:
+        context = multiprocessing.get_context("spawn")
+        for name in args.scenarios:
+            with context.Pool(1) as pool:
+                reports.append(pool.apply(run_scenario, (name, url, options)))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print_table(reports)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"options": vars(args), "reports": reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
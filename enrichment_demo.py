@@ -45,14 +45,18 @@ if __name__ == "__main__":
     print(company_summary(company))
     # option 2
     print("\nrequest with company social URLs")
-    for url in [
-        "https://www.instagram.com/allbirds",
-        "https://www.facebook.com/weareallbirds/",
-        "https://www.crunchbase.com/organization/amazon",
-        "https://pitchbook.com/profiles/company/11919-79",
-        "https://angel.co/company/amazon",
-        "https://www.linkedin.com/company/amazon/",
-    ]:
-        print(f"{url}")
-        company = client.enrich_company(url)
-        print(company_summary(company))
+    for enrichment in client.enrich_companies(
+        [
+            "https://www.instagram.com/allbirds",
+            "https://www.facebook.com/weareallbirds/",
+            "https://www.crunchbase.com/organization/amazon",
+            "https://pitchbook.com/profiles/company/11919-79",
+            "https://angel.co/company/amazon",
+            "https://www.linkedin.com/company/amazon/",
+        ]
+    ):
+        print(f"{enrichment.input}")
+        if enrichment.ok:
+            print(company_summary(enrichment.result))
+        else:
+            print(f"failed: {enrichment.error}")
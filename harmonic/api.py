@@ -1,15 +1,71 @@
 import json
+import logging
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from urllib.parse import urlparse
 
 import requests
-from requests.api import request
+from requests.adapters import HTTPAdapter
+
+from harmonic.canonical import canonicalize_url, profile_url_type, url_key
+from harmonic.metrics import ByteCounter, HarmonicMetrics, endpoint_name, request_size
+from harmonic.paging import AdaptivePageSize, PageTooLarge
+from harmonic.ratelimit import RateLimiter, parse_retry_after, retry_delay
+from harmonic.streaming import iter_json_array
+from harmonic.views import RecordView, loads, page_records, record_loader, record_views
+
+logger = logging.getLogger(__name__)
 
 HARMONIC_CONSUMER_API_ENDPOINT = "https://api.harmonic.ai"
 HARMONIC_CONSUMER_API_ERROR_MSG = "Error out unexpectedly. Please check your rate limit, timeout setting or contact us support@harmonic.ai"
 HARMONIC_CONSUMER_API_INTERNAL_ERROR_MSG = "Our service is having some issues"
 HARMONIC_CONSUMER_API_RETRYING_MSG = "Something is wrong, retrying..."
 HARMONIC_CONSUMER_API_MAX_RETRY_COUNT = 5
+HARMONIC_CONSUMER_API_POOL_CONNECTIONS = 10
+HARMONIC_CONSUMER_API_POOL_MAXSIZE = 32
+HARMONIC_CONSUMER_API_STREAM_CHUNK_SIZE = 64 * 1024
+HARMONIC_CONSUMER_API_MAX_WORKERS = 8
+HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST = 100  # keeps the GET query string short
+HARMONIC_CONSUMER_API_HYDRATION_INCLUDES = ("people",)
+HARMONIC_CONSUMER_API_ENRICH_DEDUP_WINDOW = 4096  # distinct inputs whose results serve repeats
+
+
+class HarmonicAPIError(Exception):
+    """a request to the Harmonic API failed"""
+
+    def __init__(self, message, status_code=None, url=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.url = url
+        self.body = body
+
+
+class HarmonicClientError(HarmonicAPIError):
+    """the API rejected the request (4xx), retrying will not help"""
+
+
+class HarmonicRateLimitError(HarmonicAPIError):
+    """429, retry_after is the wait in seconds asked by the server if any"""
+
+    def __init__(self, message, retry_after=None, **kwargs):
+        super().__init__(message, **kwargs)
+        self.retry_after = retry_after
+
+
+class HarmonicServerError(HarmonicAPIError):
+    """5xx"""
+
+
+class HarmonicConnectionError(HarmonicAPIError):
+    """the request did not get a response"""
+
+
+class HarmonicPageError(HarmonicAPIError):
+    """a page of results could not be fetched after HARMONIC_CONSUMER_API_MAX_RETRY_COUNT attempts"""
 
 
 class COMPANY_CANONICAL_URL_TYPE(str, Enum):
@@ -29,20 +85,9 @@ class COMPANY_CANONICAL_URL_TYPE(str, Enum):
 
     @classmethod
     def from_domain(cls, root_domain):
-        domain_map = {
-            "linkedin.com": COMPANY_CANONICAL_URL_TYPE.LinkedinCompanyCanonical,
-            "twitter.com": COMPANY_CANONICAL_URL_TYPE.TwitterCompanyCanonical,
-            "crunchbase.com": COMPANY_CANONICAL_URL_TYPE.CrunchbaseCompanyCanonical,
-            "pitchbook.com": COMPANY_CANONICAL_URL_TYPE.PitchbookCompanyCanonical,
-            "instagram.com": COMPANY_CANONICAL_URL_TYPE.InstagramCompanyCanonical,
-            "facebook.com": COMPANY_CANONICAL_URL_TYPE.FacebookCompanyCanonical,
-            "angel.co": COMPANY_CANONICAL_URL_TYPE.AngellistCompanyCanonical,
-            "monster.com": COMPANY_CANONICAL_URL_TYPE.MonsterCompanyCanonical,
-            "indeed.com": COMPANY_CANONICAL_URL_TYPE.IndeedCompanyCanonical,
-            "stackoverflow.com": COMPANY_CANONICAL_URL_TYPE.StackoverflowCompanyCanonical,
-            "glassdoor.com": COMPANY_CANONICAL_URL_TYPE.GlassdoorCompanyCanonical,
-        }
-        return domain_map.get(root_domain)
+        """url type of a domain or any of its subdomains (uk.linkedin.com), None for other sites"""
+        url_type = profile_url_type(root_domain)
+        return cls(url_type) if url_type else None
 
 
 class PERSON_CANONICAL_URL_TYPE(str, Enum):
@@ -57,21 +102,343 @@ class HarmonicCompanyEnrichmentRequest:
         self.url = url
 
     @classmethod
-    def infer_from_url(cls, url):
-        parsed_uri = urlparse(url)
-        domain = "{uri.netloc}/".format(uri=parsed_uri)
-        root_domain = domain.replace("www.", "").rstrip("/")
-        url_type = COMPANY_CANONICAL_URL_TYPE.from_domain(root_domain)
-        return HarmonicCompanyEnrichmentRequest(url_type, url) if url_type else None
+    def infer_from_url(cls, url, default_type=None):
+        """request with the url type of the url's domain
+
+        default_type (e.g. COMPANY_CANONICAL_URL_TYPE.WebsiteCompanyCanonical)
+        is used for the domains that are not profile sites, else None is returned
+        """
+        url_type, _ = canonicalize_url(
+            url, default_type.value if default_type else None
+        )
+        return (
+            HarmonicCompanyEnrichmentRequest(COMPANY_CANONICAL_URL_TYPE(url_type), url)
+            if url_type
+            else None
+        )
 
     def to_dict(self):
         return {self.canonical_url_type.value: self.url}
 
+    def canonical_key(self):
+        """same key for every spelling of the same company URL"""
+        return (
+            self.canonical_url_type.value,
+            url_key(self.canonical_url_type.value, self.url),
+        )
+
+
+class ENRICHMENT_STATUS(str, Enum):
+    Success = "success"
+    Error = "error"
+
+
+class HarmonicEnrichmentResult:
+    """outcome of one input of enrich_companies / enrich_persons"""
+
+    def __init__(self, input, status, result=None, error=None):
+        self.input = input
+        self.status = status
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == ENRICHMENT_STATUS.Success
+
+    def __repr__(self):
+        return f"HarmonicEnrichmentResult({self.input!r}, {self.status.value})"
+
+
+def _enrichment_result(input, future, error):
+    if future is not None:
+        try:
+            return HarmonicEnrichmentResult(
+                input, ENRICHMENT_STATUS.Success, result=future.result()
+            )
+        except Exception as e:
+            error = e
+    return HarmonicEnrichmentResult(input, ENRICHMENT_STATUS.Error, error=error)
+
+
+def id_chunks(ids, chunk_size):
+    """distinct ids, in first seen order, split in lists of at most chunk_size"""
+    unique_ids = list(dict.fromkeys(ids))
+    return [
+        unique_ids[i : i + chunk_size] for i in range(0, len(unique_ids), chunk_size)
+    ]
+
+
+def match_by_ids(ids, isURN, responses):
+    """records of the responses lined up with ids, None for the ids not found"""
+    id_field = "entity_urn" if isURN else "id"
+    by_id = {}
+    for records in responses:
+        for record in records:
+            by_id[str(record.get(id_field))] = record
+    return [by_id.get(str(id)) for id in ids]
+
+
+def lazy_fields(lazy):
+    """lazy with "id" and "entity_urn" added to its projection, records are matched by them"""
+    if not lazy or lazy is True:
+        return lazy
+    return [*lazy, "id", "entity_urn"]
+
+
+def find_watchlist(watchlists, watchlist_id):
+    for watchlist in watchlists:
+        if watchlist_id in (watchlist.get("entity_urn"), watchlist.get("id")) or str(
+            watchlist.get("id")
+        ) == str(watchlist_id):
+            return watchlist
+    return None
+
+
+def watchlist_diff(watchlist, desired_urns):
+    """(urns to add, urns to remove) to turn the watchlist membership into desired_urns"""
+    # dicts keep the watchlist's and the caller's order, so are the results
+    current = dict.fromkeys(company["entity_urn"] for company in watchlist["companies"])
+    desired = dict.fromkeys(desired_urns)
+    to_add = [urn for urn in desired if urn not in current]
+    to_remove = [urn for urn in current if urn not in desired]
+    return to_add, to_remove
+
+
+def company_enrichment_request(url_or_enrichment_request, default_type=None):
+    if isinstance(url_or_enrichment_request, str):
+        enrichment_request = HarmonicCompanyEnrichmentRequest.infer_from_url(
+            url_or_enrichment_request, default_type
+        )
+        if not enrichment_request:
+            raise ValueError(
+                "Not able to infer valid domain type from URL, try using HarmonicCompanyEnrichmentRequest(COMPANY_CANONICAL_URL_TYPE.WebsiteCompanyCanonical, YOUR_URL) as parameter"
+            )
+        return enrichment_request
+    elif isinstance(url_or_enrichment_request, HarmonicCompanyEnrichmentRequest):
+        return url_or_enrichment_request
+    else:
+        raise ValueError(
+            "Enrichment input has to be either url(str) or HarmonicCompanyEnrichmentRequest"
+        )
+
+
+def company_enrichment_params(url_or_enrichment_request, default_type=None):
+    """query params identifying the company to enrich"""
+    return company_enrichment_request(url_or_enrichment_request, default_type).to_dict()
+
+
+def id_cache_key(id, isURN=False):
+    return str(id) if isURN or str(id).startswith("urn:") else f"id:{id}"
+
+
+def record_cache_keys(record):
+    """every fetch key the record can be looked up with"""
+    keys = []
+    if record.get("entity_urn"):
+        keys.append(record["entity_urn"])
+    if record.get("id") is not None:
+        keys.append(f"id:{record['id']}")
+    return keys
+
+
+def hydration_includes(include):
+    include = tuple(include or ())
+    for relation in include:
+        if relation not in HARMONIC_CONSUMER_API_HYDRATION_INCLUDES:
+            raise ValueError(
+                f"include has to be made of {HARMONIC_CONSUMER_API_HYDRATION_INCLUDES}"
+            )
+    return include
+
+
+def person_urns(companies):
+    """distinct URNs of the people of the companies, in first seen order"""
+    urns = {}
+    for company in companies:
+        for bio in company.get("people") or ():
+            if bio.get("person"):
+                urns[bio["person"]] = None
+    return list(urns)
+
+
+def attach_people(companies, persons_by_urn):
+    """copies of the companies with bio["person_record"] set on every bio of their people
+
+    The companies are not modified, they may be records shared by the cache.
+    A harmonic.views.RecordView company gives a RecordView, see RecordView.replace.
+    """
+    hydrated = []
+    for company in companies:
+        people = company.get("people")
+        if people and isinstance(company, RecordView):
+            # lazy records stay read-only views
+            company = company.replace(
+                people=tuple(
+                    bio.replace(person_record=persons_by_urn.get(bio.get("person")))
+                    for bio in people
+                )
+            )
+        elif people:
+            company = {
+                **company,
+                "people": [
+                    {**bio, "person_record": persons_by_urn.get(bio.get("person"))}
+                    for bio in people
+                ],
+            }
+        hydrated.append(company)
+    return hydrated
+
+
+def search_request(api_endpoint, keywords_or_query, page, page_size, include_results):
+    """(url, body) of a search by keywords or api_query"""
+    SEARCH_BY_QUERY_API_URL = f"{api_endpoint}/search/companies"
+    SEARCH_BY_KEYWORDS_API_URL = f"{api_endpoint}/search/companies_by_keywords?page={page}&size={page_size}"
+    API_URL = None
+    body = {
+        "type": "COMPANIES_LIST",
+    }
+    if isinstance(keywords_or_query, str):
+        API_URL = SEARCH_BY_KEYWORDS_API_URL
+        body["keywords"] = keywords_or_query
+        body["include_ids_only"] = not include_results
+    elif isinstance(keywords_or_query, dict):
+        API_URL = SEARCH_BY_QUERY_API_URL
+        # copied, the caller's query is reused for every page and by other threads
+        body["query"] = {
+            **keywords_or_query,
+            "pagination": {
+                **(keywords_or_query.get("pagination") or {}),
+                "start": page * page_size,
+                "page_size": page_size,
+            },
+        }
+    else:
+        raise ValueError("Search input has to be keywords(str) or query(dict)")
+    return API_URL, body
+
+
+def api_error(status_code, read_json, url, headers=None):
+    """typed error of a non 200 response, read_json returns the response body"""
+    try:
+        body = read_json()
+    except ValueError:
+        body = None
+    if status_code == 429:
+        return HarmonicRateLimitError(
+            f"{body}\n{url}",
+            retry_after=parse_retry_after((headers or {}).get("Retry-After")),
+            status_code=status_code,
+            url=url,
+            body=body,
+        )
+    elif status_code == 500:
+        return HarmonicServerError(
+            f"{HARMONIC_CONSUMER_API_INTERNAL_ERROR_MSG}\n{url}",
+            status_code=status_code,
+            url=url,
+            body=body,
+        )
+    elif status_code > 500:
+        return HarmonicServerError(
+            f"{body}\n{url}", status_code=status_code, url=url, body=body
+        )
+    else:
+        return HarmonicClientError(
+            f"{body}\n{url}", status_code=status_code, url=url, body=body
+        )
+
+
+_API_KEY_PARAM = re.compile(r"(apikey=)[^&\s'\"]+", re.IGNORECASE)
+
+
+def redact(text):
+    """text with the value of apikey query parameters masked"""
+    return _API_KEY_PARAM.sub(r"\1***", text)
+
+
+def connection_error(exception, url):
+    """HarmonicConnectionError of a transport exception, whose text often holds the full url"""
+    return HarmonicConnectionError(f"{redact(str(exception))}\n{url}", url=url)
+
+
+def is_retryable(error):
+    return isinstance(
+        error, (HarmonicRateLimitError, HarmonicServerError, HarmonicConnectionError)
+    )
+
 
 class HarmonicClient:
-    def __init__(self, API_KEY):
+    def __init__(
+        self,
+        API_KEY,
+        pool_connections=HARMONIC_CONSUMER_API_POOL_CONNECTIONS,
+        pool_maxsize=HARMONIC_CONSUMER_API_POOL_MAXSIZE,
+        pool_block=False,
+        keep_alive=True,
+        cache=None,
+        rate_limit=None,
+        rate_limiter=None,
+        max_retries=HARMONIC_CONSUMER_API_MAX_RETRY_COUNT,
+        metrics=None,
+    ):
+        """
+        pool_connections: number of hosts to keep connection pools for
+        pool_maxsize: max connections kept alive per host
+        pool_block: wait for a free connection instead of opening an extra one
+        keep_alive: reuse connections between requests
+        cache: optional harmonic.cache.HarmonicCache for fetch and enrich calls
+        rate_limit: max requests per second across all the threads using the client
+        rate_limiter: harmonic.ratelimit.RateLimiter to share with other clients, overrides rate_limit
+        max_retries: attempts per request on 429, 5xx and connection errors
+        metrics: harmonic.metrics.HarmonicMetrics to share with other clients
+        """
         self.API_KEY = API_KEY
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter(rate_limit)
+        self.max_retries = max_retries
+        self.metrics = metrics or HarmonicMetrics()
+        # set by harmonic.watchlist_mirror.WatchlistMirror(client)
+        self.watchlist_mirror = None
         self._set_api_endpoint()
+        # one adapter (and so one urllib3 pool) is shared by every thread,
+        # each thread gets its own Session on top of it, dropped with the thread
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self._keep_alive = keep_alive
+        self._local = threading.local()
+        self._sessions = weakref.WeakSet()
+        self._sessions_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        with self._sessions_lock:
+            sessions, self._sessions = list(self._sessions), weakref.WeakSet()
+        for session in sessions:
+            session.close()
+        self._adapter.close()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            if not self._keep_alive:
+                session.headers["Connection"] = "close"
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.add(session)
+        return session
 
     def _set_api_endpoint(self, api_endpoint=None):
         if api_endpoint:
@@ -79,39 +446,105 @@ class HarmonicClient:
         else:
             self.API_ENDPOINT = HARMONIC_CONSUMER_API_ENDPOINT
 
-    def _request(self, method, url, params=None, json=None):
-        res = request(method, url, params=params, json=json, data=None)
-        if res.status_code == 200:
-            return res.json()
-        elif res.status_code == 500:
-            raise Exception(f"{HARMONIC_CONSUMER_API_INTERNAL_ERROR_MSG}\n{url}")
-        else:
-            raise Exception(f"{res.json()}\n{url}")
+    def _request(self, method, url, params=None, json=None, raw=False):
+        """decoded JSON of a 200 response, its bytes with raw=True, retried on retryable errors"""
+        endpoint = endpoint_name(url, self.API_ENDPOINT)
+        with self.metrics.span(
+            f"{method.upper()} {endpoint}", **{"http.method": method, "http.route": endpoint}
+        ) as span:
+            attempt = 0
+            while True:
+                self.rate_limiter.acquire()
+                start = time.perf_counter()
+                try:
+                    res = self._session().request(
+                        method, url, params=params, json=json
+                    )
+                except requests.exceptions.RequestException as e:
+                    self.metrics.observe(
+                        endpoint, method, "error", time.perf_counter() - start
+                    )
+                    error = connection_error(e, url)
+                else:
+                    self.metrics.observe(
+                        endpoint,
+                        method,
+                        res.status_code,
+                        time.perf_counter() - start,
+                        request_bytes=request_size(res.request),
+                        response_bytes=len(res.content),
+                    )
+                    span.set_attribute("http.status_code", res.status_code)
+                    if res.status_code == 200:
+                        self.rate_limiter.on_success()
+                        return res.content if raw else res.json()
+                    error = self._response_error(res, url)
+                attempt += 1
+                if attempt >= self.max_retries or not is_retryable(error):
+                    raise error
+                span.set_attribute("harmonic.retries", attempt)
+                self.metrics.observe_retry(endpoint, error)
+                logger.warning("%s %s", HARMONIC_CONSUMER_API_RETRYING_MSG, error)
+                self._wait_before_retry(attempt, error)
+
+    def _response_error(self, res, url):
+        error = api_error(res.status_code, res.json, url, res.headers)
+        if isinstance(error, HarmonicRateLimitError):
+            self.rate_limiter.on_rate_limited(error.retry_after)
+        return error
+
+    def _wait_before_retry(self, attempt, error):
+        # after a Retry-After the shared rate limiter already holds every caller back
+        if not (isinstance(error, HarmonicRateLimitError) and error.retry_after):
+            time.sleep(retry_delay(attempt))
+
+    def _retry_page(self, page, page_error_count, error):
+        """bumps the error count of a page, waits before its retry or raises HarmonicPageError"""
+        page_error_count += 1
+        logger.warning("page %s: %s", page, error)
+        if page_error_count >= self.max_retries or not is_retryable(error):
+            raise HarmonicPageError(
+                f"page {page}: {HARMONIC_CONSUMER_API_ERROR_MSG}",
+                status_code=error.status_code,
+                url=error.url,
+                body=error.body,
+            ) from error
+        logger.warning("page %s: %s", page, HARMONIC_CONSUMER_API_RETRYING_MSG)
+        self.metrics.observe_retry(endpoint_name(error.url or "", self.API_ENDPOINT), error)
+        self._wait_before_retry(page_error_count, error)
+        return page_error_count
+
+    def _observe_page(self, API_URL, status, start, response=None, response_bytes=0, records=None):
+        self.metrics.observe(
+            endpoint_name(API_URL, self.API_ENDPOINT),
+            "get",
+            status,
+            time.perf_counter() - start,
+            request_bytes=request_size(response.request) if response is not None else 0,
+            response_bytes=response_bytes,
+            records=records,
+        )
 
     # [ENRICH](https://console.harmonic.ai/docs/api-reference/enrich)
-    def enrich_company(self, url_or_enrichment_request):
-        """[Enrich a company **POST**](https://console.harmonic.ai/docs/api-reference/enrich#enrich-a-company)"""
-        params = {"apikey": self.API_KEY}
-        if isinstance(url_or_enrichment_request, str):
-            enrichment_request = HarmonicCompanyEnrichmentRequest.infer_from_url(
-                url_or_enrichment_request
-            )
-            if not enrichment_request:
-                raise ValueError(
-                    "Not able to infer valid domain type from URL, try using HarmonicCompanyEnrichmentRequest(COMPANY_CANONICAL_URL_TYPE.WebsiteCompanyCanonical, YOUR_URL) as parameter"
-                )
-            params = {
-                **params,
-                **enrichment_request.to_dict(),
-            }
-        elif isinstance(url_or_enrichment_request, HarmonicCompanyEnrichmentRequest):
-            params = {**params, **url_or_enrichment_request.to_dict()}
-        else:
-            raise ValueError(
-                "Enrichment input has to be either url(str) or HarmonicCompanyEnrichmentRequest"
-            )
+    def enrich_company(self, url_or_enrichment_request, default_type=None):
+        """[Enrich a company **POST**](https://console.harmonic.ai/docs/api-reference/enrich#enrich-a-company)
+
+        default_type: url type of the urls that are not on a profile site, e.g.
+        COMPANY_CANONICAL_URL_TYPE.WebsiteCompanyCanonical
+        """
+        enrichment_request = company_enrichment_request(
+            url_or_enrichment_request, default_type
+        )
+        params = {
+            "apikey": self.API_KEY,
+            **enrichment_request.to_dict(),
+        }
         API_URL = f"{self.API_ENDPOINT}/companies"
-        company = self._request("post", API_URL, params=params)
+        company = self._cached(
+            "company",
+            ":".join(enrichment_request.canonical_key()),
+            lambda: self._request("post", API_URL, params=params),
+        )
 
         return company
 
@@ -122,10 +555,90 @@ class HarmonicClient:
             "linkedin_url": url,
         }
         API_URL = f"{self.API_ENDPOINT}/persons"
-        person = self._request("post", API_URL, params=params)
+        person = self._cached(
+            "person",
+            f"linkedin_url:{url_key('linkedin_url', url)}",
+            lambda: self._request("post", API_URL, params=params),
+        )
 
         return person
 
+    def enrich_companies(
+        self,
+        urls_or_enrichment_requests,
+        max_workers=HARMONIC_CONSUMER_API_MAX_WORKERS,
+        default_type=None,
+    ):
+        """generator of one HarmonicEnrichmentResult per input, in input order
+
+        Inputs pointing to the same company (uk.linkedin.com/company/acme/ and
+        linkedin.com/company/Acme?trk=1) are enriched once, a failing input
+        only marks its own result as an error. The results of the last
+        HARMONIC_CONSUMER_API_ENRICH_DEDUP_WINDOW distinct companies are kept
+        for their repeats, older ones are enriched again (or read from
+        client.cache when set).
+        """
+
+        def company_request(url_or_enrichment_request):
+            enrichment_request = company_enrichment_request(
+                url_or_enrichment_request, default_type
+            )
+            return enrichment_request.canonical_key(), enrichment_request
+
+        return self._enrich_many(
+            urls_or_enrichment_requests,
+            company_request,
+            self.enrich_company,
+            max_workers,
+        )
+
+    def enrich_persons(self, urls, max_workers=HARMONIC_CONSUMER_API_MAX_WORKERS):
+        """generator of one HarmonicEnrichmentResult per input linkedin url, in input order"""
+        return self._enrich_many(
+            urls,
+            lambda url: (url_key("linkedin_url", url), url),
+            self.enrich_person,
+            max_workers,
+        )
+
+    def _enrich_many(self, inputs, to_request, enrich, max_workers):
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        # one future per distinct entity, duplicates share the first one's
+        # result; only the most recent entities are remembered so memory does
+        # not grow with the number of distinct inputs
+        futures_by_key = OrderedDict()
+        window = max(HARMONIC_CONSUMER_API_ENRICH_DEDUP_WINDOW, max_workers * 4)
+        pending = deque()
+        try:
+            for input in inputs:
+                try:
+                    key, enrichment_request = to_request(input)
+                except (ValueError, AttributeError, TypeError) as e:
+                    pending.append((input, None, e))
+                else:
+                    future = futures_by_key.get(key)
+                    if future is None:
+                        future = executor.submit(enrich, enrichment_request)
+                        futures_by_key[key] = future
+                        if len(futures_by_key) > window:
+                            futures_by_key.popitem(last=False)
+                    else:
+                        futures_by_key.move_to_end(key)
+                    pending.append((input, future, None))
+                # bound the look-ahead so a huge input is never fully buffered
+                while pending and (
+                    len(pending) > max_workers * 4
+                    or pending[0][1] is None
+                    or pending[0][1].done()
+                ):
+                    yield _enrichment_result(*pending.popleft())
+            while pending:
+                yield _enrichment_result(*pending.popleft())
+        finally:
+            for _, future, _ in pending:
+                if future is not None:
+                    future.cancel()
+            executor.shutdown(wait=False)
 
     # [DISCOVER](https://console.harmonic.ai/docs/api-reference/discover#discover)
     def get_saved_searches(self):
@@ -140,124 +653,563 @@ class HarmonicClient:
         return saved_searches
 
     def get_saved_search_results(
-        self, saved_search_id, record_processor=None, page_size=100
+        self,
+        saved_search_id,
+        record_processor=None,
+        page_size=100,
+        prefetch=0,
+        include=None,
+        changes=None,
     ):
-        """[Get saved search results **GET**](https://console.harmonic.ai/docs/api-reference/discover#get-saved-search-results)"""
-        API_URL = f"{self.API_ENDPOINT}/saved_searches:results/{saved_search_id}"
+        """[Get saved search results **GET**](https://console.harmonic.ai/docs/api-reference/discover#get-saved-search-results)
+
+        prefetch: number of following pages fetched in parallel while the current page is processed
+        include: relations attached to every company before record_processor, see hydrate_companies
+        changes: a harmonic.changes.ChangeTracker, record_processor then only gets a
+        RecordChange for every company added, changed or removed since the previous run
+        """
         total_result_count = 0
+
+        def log_page_info(page, page_result_count):
+            PAGE_INFO = f"page {page}: {page_result_count} results {'(some results might get merged or deleted)' if page_result_count < page_size else ''}"
+            logger.info(PAGE_INFO)
+
+        try:
+            records = self.iter_saved_search_results(
+                saved_search_id,
+                page_size=page_size,
+                prefetch=prefetch,
+                on_page=log_page_info,
+            )
+            if include:
+                records = self.iter_hydrated_companies(
+                    records, include=include, batch_size=page_size
+                )
+            if changes is not None:
+                records = changes.track(saved_search_id, records)
+            for record in records:
+                if record_processor and callable(record_processor):
+                    record_processor(record)
+                total_result_count += 1
+        except HarmonicPageError as e:
+            logger.error(e)
+            return
+        logger.info("END")
+        logger.info(
+            "COMPLETE: search %s generated %s %s",
+            saved_search_id,
+            total_result_count,
+            "changes" if changes is not None else "results",
+        )
+
+    def iter_saved_search_results(
+        self,
+        saved_search_id,
+        page_size=100,
+        prefetch=0,
+        on_page=None,
+        start_page=0,
+        adaptive=None,
+        lazy=None,
+    ):
+        """generator over all the results of a saved search
+
+        Without prefetch every record is decoded and yielded as soon as its bytes
+        arrive, so memory stays around one record whatever the page_size.
+        on_page(page, page_result_count) is called once a page is fully consumed.
+        adaptive: True or a harmonic.paging.AdaptivePageSize, tunes the page size
+        from latency, response bytes and errors instead of using page_size, and
+        keeps the pages held in memory (prefetch of them, at least 1) under its
+        max_buffered_bytes. start_page counts pages of page_size.
+        lazy: True for read-only harmonic.views.RecordView results decoded on
+        access, or a list of dotted field paths to also project them to.
+        Raises HarmonicPageError when a page keeps failing.
+        """
+        lazy = lazy_fields(lazy)
+        if adaptive:
+            sizer = adaptive if isinstance(adaptive, AdaptivePageSize) else AdaptivePageSize()
+            for page, records in enumerate(
+                self._iter_adaptive_saved_search_pages(
+                    saved_search_id, sizer, max(1, prefetch), start_page * page_size, lazy
+                )
+            ):
+                yield from records
+                if on_page:
+                    on_page(start_page + page, len(records))
+            return
+
+        if prefetch:
+            for page, records in self._iter_saved_search_pages(
+                saved_search_id,
+                page_size=page_size,
+                prefetch=prefetch,
+                start_page=start_page,
+                lazy=lazy,
+            ):
+                yield from records
+                if on_page:
+                    on_page(page, len(records))
+            return
+
+        API_URL = f"{self.API_ENDPOINT}/saved_searches:results/{saved_search_id}"
+        page = start_page
+        loads = record_loader(lazy)
+        while True:
+            page_result_count = yield from self._stream_saved_search_page(
+                API_URL, page, page_size, loads
+            )
+            if not page_result_count:
+                return
+            if on_page:
+                on_page(page, page_result_count)
+            page += 1
+
+    def _stream_saved_search_page(self, API_URL, page, page_size, loads=json.loads):
+        """yields the records of one page while they are received, returns their count
+
+        A retry after a broken stream skips the records already yielded.
+        """
         page_result_count = 0
-        page = 0
         page_error_count = 0
-        while (
-            page_error_count < HARMONIC_CONSUMER_API_MAX_RETRY_COUNT
-        ):  # stop streaming if errors out too many times
+        while True:
+            self.rate_limiter.acquire()
+            start = time.perf_counter()
             try:
-                data = b""
-                with requests.get(
+                with self._session().get(
                     API_URL,
                     params={"page": page, "size": page_size, "apikey": self.API_KEY},
                     stream=True,
                 ) as response:
-                    if response.status_code != 200:
-                        page_error_count += 1
-                        print(f"page {page}: {HARMONIC_CONSUMER_API_RETRYING_MSG}")
-                        if response.status_code == 500:
-                            print(HARMONIC_CONSUMER_API_INTERNAL_ERROR_MSG)
-                        else:
-                            print(f"{response.json()}")
-                        continue
-                    for chunk in response.iter_content(
-                        chunk_size=10 * 1024 * 1024
-                    ):  # 10MB
-                        if chunk:  # filter out keep-alive new chunks
-                            data += chunk
-
-                res = json.loads(data)
-                page_result_count = len(res["results"])
-                PAGE_INFO = f"page {page}: {page_result_count} results {'(some results might get merged or deleted)' if page_result_count < page_size else ''}"
-                print(PAGE_INFO if page_result_count > 0 else "END")
-                if page_result_count == 0:
-                    break
-
-                for record in res["results"]:
-                    if record_processor and callable(record_processor):
-                        record_processor(record)
-            except requests.exceptions.RequestException:
-                page_error_count += 1
-                if page_error_count == HARMONIC_CONSUMER_API_MAX_RETRY_COUNT:
-                    print(f"page {page}: {HARMONIC_CONSUMER_API_ERROR_MSG}")
-                    break
-                else:
-                    print(f"page {page}: {HARMONIC_CONSUMER_API_RETRYING_MSG}")
-                    continue
+                    if response.status_code == 200:
+                        self.rate_limiter.on_success()
+                        chunks = ByteCounter(
+                            response.iter_content(
+                                chunk_size=HARMONIC_CONSUMER_API_STREAM_CHUNK_SIZE
+                            )
+                        )
+                        received = 0
+                        for i, record in enumerate(iter_json_array(chunks, loads=loads)):
+                            received = i + 1
+                            if i >= page_result_count:
+                                page_result_count += 1
+                                yield record
+                        self._observe_page(
+                            API_URL, 200, start, response, chunks.bytes, received
+                        )
+                        return page_result_count
+                    self._observe_page(
+                        API_URL,
+                        response.status_code,
+                        start,
+                        response,
+                        len(response.content),
+                    )
+                    error = self._response_error(response, API_URL)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self._observe_page(API_URL, "error", start)
+                error = connection_error(e, API_URL)
+            page_error_count = self._retry_page(page, page_error_count, error)
 
-            total_result_count += page_result_count
-            page += 1
+    def _iter_saved_search_pages(
+        self, saved_search_id, page_size=100, prefetch=1, start_page=0, lazy=None
+    ):
+        """(page, records) of a saved search in page order, until the first empty page"""
+        API_URL = f"{self.API_ENDPOINT}/saved_searches:results/{saved_search_id}"
+        executor = ThreadPoolExecutor(max_workers=prefetch)
+        in_flight = deque()
+        next_page = start_page
+        try:
+            while True:
+                while len(in_flight) < prefetch:
+                    in_flight.append(
+                        executor.submit(
+                            self._fetch_saved_search_page,
+                            API_URL,
+                            next_page,
+                            page_size,
+                            lazy=lazy,
+                        )
+                    )
+                    next_page += 1
+                page = next_page - len(in_flight)
+                records, _, _ = in_flight.popleft().result()
+                if not records:
+                    return
+                yield page, records
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
 
-        if page_error_count < HARMONIC_CONSUMER_API_MAX_RETRY_COUNT:
-            print(
-                f"COMPLETE: search {saved_search_id} generated {total_result_count} results"
+    def _iter_adaptive_saved_search_pages(
+        self, saved_search_id, sizer, prefetch, offset=0, lazy=None
+    ):
+        """records of consecutive saved search pages whose size follows sizer
+
+        A page of size s holds the results from page * s, so a page starting at
+        offset is page offset // s with its first offset % s records dropped.
+        A page too large for the byte budget is fetched again as two halves.
+        A short page may be the last one or the server's own cap on the page
+        size, which also moves its start: the sizer is limited to the records
+        received and the page is fetched again at that size, with every page
+        in flight after it. Only a short page of min_size ends the results.
+        """
+        API_URL = f"{self.API_ENDPOINT}/saved_searches:results/{saved_search_id}"
+        max_bytes = sizer.max_page_bytes(prefetch)
+        executor = ThreadPoolExecutor(max_workers=prefetch)
+        in_flight = deque()  # (offset, size, future)
+
+        def submit(offset, size, index=None):
+            future = executor.submit(
+                self._fetch_saved_search_page,
+                API_URL,
+                offset // size,
+                size,
+                max_bytes,
+                lazy,
             )
+            if index is None:
+                in_flight.append((offset, size, future))
+            else:
+                in_flight.insert(index, (offset, size, future))
+
+        next_offset = offset
+        try:
+            while True:
+                while len(in_flight) < prefetch:
+                    size = sizer.next_size(next_offset, prefetch)
+                    submit(next_offset, size)
+                    next_offset = (next_offset // size + 1) * size
+                offset, size, future = in_flight.popleft()
+                try:
+                    records, response_bytes, latency = future.result()
+                except (PageTooLarge, HarmonicPageError) as e:
+                    sizer.observe_error(size)
+                    client_error = getattr(e, "status_code", None) or 0
+                    if size <= sizer.min_size or 400 <= client_error < 500:
+                        raise
+                    # the same results as two pages of half the size
+                    half = size // 2
+                    start = offset // size * size
+                    submit(max(offset, start + half), half, 0)
+                    if offset < start + half:
+                        submit(offset, half, 0)
+                    continue
+                if 0 < len(records) < size and size > sizer.min_size:
+                    sizer.limit(len(records))
+                    for _, _, pending in in_flight:
+                        pending.cancel()
+                    in_flight.clear()
+                    next_offset = offset
+                    continue
+                sizer.observe(size, len(records), latency, response_bytes)
+                records = records[offset % size :]
+                if not records:
+                    return
+                yield records
+        finally:
+            for _, _, future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _fetch_saved_search_page(
+        self, API_URL, page, page_size, max_bytes=None, lazy=None
+    ):
+        """(records, response bytes, latency) of one page, each page is retried on its own
+
+        Raises PageTooLarge as soon as the response passes max_bytes.
+        """
+        page_error_count = 0
+        while True:
+            self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                with self._session().get(
+                    API_URL,
+                    params={"page": page, "size": page_size, "apikey": self.API_KEY},
+                    stream=True,
+                ) as response:
+                    if response.status_code == 200:
+                        self.rate_limiter.on_success()
+                        chunks = []
+                        response_bytes = 0
+                        for chunk in response.iter_content(
+                            chunk_size=HARMONIC_CONSUMER_API_STREAM_CHUNK_SIZE
+                        ):
+                            response_bytes += len(chunk)
+                            if max_bytes is not None and response_bytes > max_bytes:
+                                raise PageTooLarge(
+                                    f"page {page} of {page_size} results is over {max_bytes} bytes"
+                                )
+                            chunks.append(chunk)
+                        # join once instead of growing a bytes object chunk by chunk
+                        data = b"".join(chunks)
+                        del chunks
+                        records = page_records(data, lazy)
+                        latency = time.perf_counter() - start
+                        self._observe_page(
+                            API_URL, 200, start, response, len(data), len(records)
+                        )
+                        return records, len(data), latency
+                    self._observe_page(
+                        API_URL,
+                        response.status_code,
+                        start,
+                        response,
+                        len(response.content),
+                    )
+                    error = self._response_error(response, API_URL)
+            except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                self._observe_page(API_URL, "error", start)
+                error = connection_error(e, API_URL)
+            page_error_count = self._retry_page(page, page_error_count, error)
+
+    def export_saved_search_results(self, saved_search_id, path, **kwargs):
+        """stream all the results of a saved search to a JSONL file, see harmonic.export"""
+        from harmonic.export import export_saved_search_results
+
+        return export_saved_search_results(self, saved_search_id, path, **kwargs)
 
     def search(self, keywords_or_query, page=0, page_size=50, include_results=True):
         """[Conduct a search **POST**](https://console.harmonic.ai/docs/api-reference/discover#conduct-a-search)"""
-        # search by keywords or api_query
-        SEARCH_BY_QUERY_API_URL = f"{self.API_ENDPOINT}/search/companies"
-        SEARCH_BY_KEYWORDS_API_URL = f"{self.API_ENDPOINT}/search/companies_by_keywords?page={page}&size={page_size}"
-        API_URL = None
-        body = {
-            "type": "COMPANIES_LIST",
-        }
-        if isinstance(keywords_or_query, str):
-            API_URL = SEARCH_BY_KEYWORDS_API_URL
-            body["keywords"] = keywords_or_query
-            body["include_ids_only"] = not include_results
-        elif isinstance(keywords_or_query, dict):
-            API_URL = SEARCH_BY_QUERY_API_URL
-            if not keywords_or_query.get("pagination"):
-                keywords_or_query["pagination"] = {}
-            keywords_or_query["pagination"]["start"] = page * page_size
-            keywords_or_query["pagination"]["page_size"] = page_size
-            body["query"] = keywords_or_query
-        else:
-            raise ValueError("Search input has to be keywords(str) or query(dict)")
+        API_URL, body = search_request(
+            self.API_ENDPOINT, keywords_or_query, page, page_size, include_results
+        )
         company = self._request(
             "post", API_URL, params={"apikey": self.API_KEY}, json=body
         )
         return company
 
+    def iter_search(
+        self,
+        keywords_or_query,
+        page_size=50,
+        max_workers=HARMONIC_CONSUMER_API_MAX_WORKERS,
+        include_results=True,
+        hydrate=False,
+    ):
+        """generator over every result of a search, in order
+
+        for company in client.iter_search(query, page_size=100):
+            ...
+
+        The first page gives the total count, the other pages are then fetched
+        max_workers at a time. include_results=False yields company URNs,
+        hydrate=True searches for URNs only and fetches their companies in
+        batches with get_companies_by_ids, which goes through the cache.
+        """
+        for results in self._iter_search_pages(
+            keywords_or_query, page_size, max_workers, include_results and not hydrate
+        ):
+            if hydrate and all(isinstance(result, str) for result in results):
+                results = [
+                    company
+                    for company in self.get_companies_by_ids(
+                        results, isURN=True, max_workers=max_workers
+                    )
+                    if company is not None
+                ]
+            yield from results
+
+    def _iter_search_pages(self, keywords_or_query, page_size, max_workers, include_results):
+        """results of each search page in page order"""
+        first = self.search(keywords_or_query, 0, page_size, include_results)
+        yield first["results"]
+        count = first.get("count")
+        if count is None:
+            # no total, page one by one until a short page
+            page, results = 1, first["results"]
+            while len(results) >= page_size:
+                results = self.search(keywords_or_query, page, page_size, include_results)["results"]
+                if not results:
+                    return
+                yield results
+                page += 1
+            return
+
+        page_count = -(-count // page_size)
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        in_flight = deque()
+        next_page = 1
+        try:
+            while next_page < page_count or in_flight:
+                while next_page < page_count and len(in_flight) < max_workers:
+                    in_flight.append(
+                        executor.submit(
+                            self.search, keywords_or_query, next_page, page_size, include_results
+                        )
+                    )
+                    next_page += 1
+                results = in_flight.popleft().result()["results"]
+                if not results:
+                    return
+                yield results
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
     # [FETCH](https://console.harmonic.ai/docs/api-reference/fetch#fetch)
     def get_company_by_id(self, id):
         """[Get company by ID **GET**](https://console.harmonic.ai/docs/api-reference/fetch#get-company-by-id)"""
         API_URL = f"{self.API_ENDPOINT}/companies/{id}"
-        company = self._request("get", API_URL, params={"apikey": self.API_KEY})
+        company = self._cached(
+            "company",
+            id_cache_key(id),
+            lambda: self._request("get", API_URL, params={"apikey": self.API_KEY}),
+        )
         return company
 
-    def get_companies_by_ids(self, ids, isURN=False):
-        """[Get companies by ID **GET**](https://console.harmonic.ai/docs/api-reference/fetch#get-companies-by-id)"""
+    def get_companies_by_ids(
+        self,
+        ids,
+        isURN=False,
+        chunk_size=HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST,
+        max_workers=HARMONIC_CONSUMER_API_MAX_WORKERS,
+        lazy=None,
+    ):
+        """[Get companies by ID **GET**](https://console.harmonic.ai/docs/api-reference/fetch#get-companies-by-id)
+
+        Returns one entry per input id, in input order, None when the company is not found.
+        Repeated ids are fetched once and large inputs are split into parallel requests of chunk_size ids.
+        lazy: True or a list of dotted field paths for RecordView results, see iter_saved_search_results
+        """
         API_URL = f"{self.API_ENDPOINT}/companies"
-        companies = self._request(
-            "get",
-            API_URL,
-            params={("urns" if isURN else "ids"): ids, "apikey": self.API_KEY},
+        return self._get_by_ids(
+            "company", API_URL, ids, isURN, chunk_size, max_workers, lazy
         )
-        return companies
 
     def get_person_by_id(self, id):
         """[Get person by ID **GET**](https://console.harmonic.ai/docs/api-reference/fetch#get-person-by-id)"""
         API_URL = f"{self.API_ENDPOINT}/persons/{id}"
-        person = self._request("get", API_URL, params={"apikey": self.API_KEY})
+        person = self._cached(
+            "person",
+            id_cache_key(id),
+            lambda: self._request("get", API_URL, params={"apikey": self.API_KEY}),
+        )
         return person
 
-    def get_persons_by_ids(self, ids, isURN=False):
-        """[Get persons by ID **GET](https://console.harmonic.ai/docs/api-reference/fetch#get-persons-by-id)"""
+    def get_persons_by_ids(
+        self,
+        ids,
+        isURN=False,
+        chunk_size=HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST,
+        max_workers=HARMONIC_CONSUMER_API_MAX_WORKERS,
+        lazy=None,
+    ):
+        """[Get persons by ID **GET](https://console.harmonic.ai/docs/api-reference/fetch#get-persons-by-id)
+
+        Returns one entry per input id, in input order, None when the person is not found.
+        Repeated ids are fetched once and large inputs are split into parallel requests of chunk_size ids.
+        lazy: True or a list of dotted field paths for RecordView results, see iter_saved_search_results
+        """
         API_URL = f"{self.API_ENDPOINT}/persons"
-        persons = self._request(
-            "get",
-            API_URL,
-            params={("urns" if isURN else "ids"): ids, "apikey": self.API_KEY},
+        return self._get_by_ids(
+            "person", API_URL, ids, isURN, chunk_size, max_workers, lazy
         )
-        return persons
+
+    def _cached(self, entity_type, key, fetch):
+        if self.cache is None:
+            return fetch()
+        record = self.cache.get(entity_type, key)
+        if record is None:
+            record = fetch()
+            self.cache.set(entity_type, [key, *record_cache_keys(record)], record)
+        return record
+
+    def _get_by_ids(
+        self, entity_type, API_URL, ids, isURN, chunk_size, max_workers, lazy=None
+    ):
+        lazy = lazy_fields(lazy)
+        fields = None if lazy is True else lazy
+        cached = {}
+        if self.cache is not None:
+            for id in dict.fromkeys(ids):
+                record = self.cache.get(entity_type, id_cache_key(id, isURN))
+                if record is not None:
+                    cached[id] = RecordView(record, fields) if lazy else record
+        # only the misses go over the network
+        chunks = id_chunks([id for id in ids if id not in cached], chunk_size)
+
+        def fetch(chunk):
+            response = self._request(
+                "get",
+                API_URL,
+                params={("urns" if isURN else "ids"): chunk, "apikey": self.API_KEY},
+                raw=bool(lazy),
+            )
+            if not lazy:
+                return response
+            if self.cache is not None:
+                # the cache keeps whole plain records, whatever the projection
+                self._cache_records(entity_type, loads(response))
+            return record_views(response, fields)
+
+        if len(chunks) <= 1:
+            responses = [fetch(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(max_workers, len(chunks))
+            ) as executor:
+                responses = list(executor.map(fetch, chunks))
+        if self.cache is not None:
+            if not lazy:
+                for records in responses:
+                    self._cache_records(entity_type, records)
+            responses.append(cached.values())
+        return match_by_ids(ids, isURN, responses)
+
+    def _cache_records(self, entity_type, records):
+        for record in records:
+            self.cache.set(entity_type, record_cache_keys(record), record)
+
+    # HYDRATE
+    def hydrate_companies(
+        self,
+        companies,
+        include=HARMONIC_CONSUMER_API_HYDRATION_INCLUDES,
+        max_workers=HARMONIC_CONSUMER_API_MAX_WORKERS,
+    ):
+        """attaches the records the companies point to, fetched in bulk
+
+        include "people": every company["people"][i] gets a "person_record",
+        the person of its "person" URN or None when it is not found.
+        The URNs of the whole batch are deduplicated and fetched with a few
+        get_persons_by_ids calls instead of one call per company.
+        Returns hydrated copies, the companies given (possibly shared cache
+        records) are left untouched.
+        """
+        companies = list(companies)
+        if "people" in hydration_includes(include):
+            urns = person_urns(companies)
+            persons = self.get_persons_by_ids(urns, isURN=True, max_workers=max_workers)
+            companies = attach_people(companies, dict(zip(urns, persons)))
+        return companies
+
+    def iter_hydrated_companies(
+        self,
+        companies,
+        include=HARMONIC_CONSUMER_API_HYDRATION_INCLUDES,
+        batch_size=100,
+        max_workers=HARMONIC_CONSUMER_API_MAX_WORKERS,
+    ):
+        """generator over companies hydrated batch_size at a time, in order
+
+        for company in client.iter_hydrated_companies(client.iter_saved_search_results(id)):
+            ...
+
+        lazy companies (iter_saved_search_results(id, lazy=True)) come back as
+        read-only views as well.
+        """
+        hydration_includes(include)
+        batch = []
+        for company in companies:
+            batch.append(company)
+            if len(batch) >= batch_size:
+                yield from self.hydrate_companies(batch, include, max_workers)
+                batch = []
+        if batch:
+            yield from self.hydrate_companies(batch, include, max_workers)
 
     # [WATCHLIST](https://console.harmonic.ai/docs/api-reference/watchlist#watchlist)
     def set_watchlist(
@@ -269,25 +1221,40 @@ class HarmonicClient:
     ):
         """[Modify a Watchlist **PUT**](https://console.harmonic.ai/docs/api-reference/watchlist#modify-company-watchlist)"""
         API_URL = f"{self.API_ENDPOINT}/watchlists/companies/{watchlist_id}"
-        wl = self.get_watchlist_by_id(watchlist_id)
-        body = {
-            "name": wl["name"],
-            "companies": [c["entity_urn"] for c in wl["companies"]],
-            "shared_with_team": wl["shared_with_team"],
-        }
+        body = {}
         if name is not None and isinstance(name, str):
             body["name"] = name
         if companies is not None and isinstance(companies, list):
             body["companies"] = companies
         if shared_with_team is not None and isinstance(shared_with_team, bool):
             body["shared_with_team"] = shared_with_team
+        # PUT replaces the whole watchlist: without companies its current
+        # membership is sent back, metadata alone comes from the listing
+        wl = None
+        if "companies" not in body:
+            wl = self.get_watchlist_by_id(watchlist_id)
+            body["companies"] = [c["entity_urn"] for c in wl["companies"]]
+        elif "name" not in body or "shared_with_team" not in body:
+            wl = self._get_watchlist_metadata(watchlist_id)
+        if wl is not None:
+            body.setdefault("name", wl["name"])
+            body.setdefault("shared_with_team", wl["shared_with_team"])
         res = self._request("put", API_URL, params={"apikey": self.API_KEY}, json=body)
+        if self.watchlist_mirror is not None:
+            self.watchlist_mirror.updated(
+                watchlist_id,
+                urns=body.get("companies"),
+                name=body["name"],
+                shared_with_team=body["shared_with_team"],
+            )
         return res
 
     def delete_watchlist(self, watchlist_id):
         """[Delete a Watchlist **DELETE**](https://console.harmonic.ai/docs/api-reference/watchlist#delete-company-watchlist)"""
         API_URL = f"{self.API_ENDPOINT}/watchlists/companies/{watchlist_id}"
         res = self._request("delete", API_URL, params={"apikey": self.API_KEY})
+        if self.watchlist_mirror is not None:
+            self.watchlist_mirror.deleted(watchlist_id)
         return res
 
     def get_watchlists(self):
@@ -301,6 +1268,11 @@ class HarmonicClient:
         watchlist = self._request("get", API_URL, params={"apikey": self.API_KEY})
         return watchlist
 
+    def _get_watchlist_metadata(self, watchlist_id):
+        """name and sharing of a watchlist without downloading its companies when possible"""
+        watchlist = find_watchlist(self.get_watchlists(), watchlist_id)
+        return watchlist or self.get_watchlist_by_id(watchlist_id)
+
     def add_company_to_watchlist(self, watchlist_id, company_ids, isURN=False):
         """[Add Companies to Watchlist **POST**](https://console.harmonic.ai/docs/api-reference/watchlist#add-companies-to-watchlist)"""
         API_URL = (
@@ -312,6 +1284,11 @@ class HarmonicClient:
             params={"apikey": self.API_KEY},
             json={("urns" if isURN else "ids"): company_ids},
         )
+        if self.watchlist_mirror is not None:
+            if isURN:
+                self.watchlist_mirror.added(watchlist_id, company_ids)
+            else:
+                self.watchlist_mirror.mark_stale(watchlist_id)
         return res
 
     def add_company_to_watchlist_by_urls(self, watchlist_id, company_urls):
@@ -325,6 +1302,8 @@ class HarmonicClient:
             params={"apikey": self.API_KEY},
             json=company_urls,
         )
+        if self.watchlist_mirror is not None:
+            self.watchlist_mirror.mark_stale(watchlist_id)
         return res
 
     def remove_company_from_watchlist(self, watchlist_id, company_ids, isURN=False):
@@ -338,4 +1317,44 @@ class HarmonicClient:
             params={"apikey": self.API_KEY},
             json={("urns" if isURN else "ids"): company_ids},
         )
+        if self.watchlist_mirror is not None:
+            if isURN:
+                self.watchlist_mirror.removed(watchlist_id, company_ids)
+            else:
+                self.watchlist_mirror.mark_stale(watchlist_id)
         return res
+
+    def sync_watchlist(
+        self,
+        watchlist_id,
+        desired_urns,
+        chunk_size=HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST,
+        max_workers=HARMONIC_CONSUMER_API_MAX_WORKERS,
+    ):
+        """make the watchlist hold exactly desired_urns with the fewest changes
+
+        Only the difference with the current membership is sent, through parallel
+        :addCompanies / :removeCompanies calls of at most chunk_size URNs.
+        Returns {"added": [...], "removed": [...]}.
+        """
+        watchlist = self.get_watchlist_by_id(watchlist_id)
+        to_add, to_remove = watchlist_diff(watchlist, desired_urns)
+        calls = [
+            (self.add_company_to_watchlist, chunk)
+            for chunk in id_chunks(to_add, chunk_size)
+        ] + [
+            (self.remove_company_from_watchlist, chunk)
+            for chunk in id_chunks(to_remove, chunk_size)
+        ]
+        if calls:
+            with ThreadPoolExecutor(
+                max_workers=min(max_workers, len(calls))
+            ) as executor:
+                futures = [
+                    executor.submit(call, watchlist_id, chunk, isURN=True)
+                    for call, chunk in calls
+                ]
+                for future in futures:
+                    future.result()
+        return {"added": to_add, "removed": to_remove}
+
@@ -0,0 +1,551 @@
+import asyncio
+import collections
+import json
+import logging
+import time
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from harmonic.api import (
+    HARMONIC_CONSUMER_API_ENDPOINT,
+    HARMONIC_CONSUMER_API_ERROR_MSG,
+    HARMONIC_CONSUMER_API_HYDRATION_INCLUDES,
+    HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST,
+    HARMONIC_CONSUMER_API_MAX_RETRY_COUNT,
+    HARMONIC_CONSUMER_API_MAX_WORKERS,
+    HARMONIC_CONSUMER_API_POOL_MAXSIZE,
+    HARMONIC_CONSUMER_API_RETRYING_MSG,
+    HarmonicPageError,
+    HarmonicRateLimitError,
+    api_error,
+    attach_people,
+    connection_error,
+    company_enrichment_params,
+    find_watchlist,
+    hydration_includes,
+    id_chunks,
+    is_retryable,
+    match_by_ids,
+    person_urns,
+    search_request,
+    watchlist_diff,
+)
+from harmonic.metrics import HarmonicMetrics, endpoint_name
+from harmonic.ratelimit import RateLimiter, retry_delay
+
+logger = logging.getLogger(__name__)
+
+HARMONIC_CONSUMER_API_MAX_CONCURRENCY = 200
+
+
+class AsyncHarmonicClient:
+    """asyncio twin of HarmonicClient, requires `pip install aiohttp`
+
+    async with AsyncHarmonicClient(API_KEY) as client:
+        companies = await asyncio.gather(*[client.enrich_company(url) for url in urls])
+    """
+
+    def __init__(
+        self,
+        API_KEY,
+        max_concurrency=HARMONIC_CONSUMER_API_MAX_CONCURRENCY,
+        limit_per_host=HARMONIC_CONSUMER_API_POOL_MAXSIZE,
+        keep_alive=True,
+        rate_limit=None,
+        rate_limiter=None,
+        max_retries=HARMONIC_CONSUMER_API_MAX_RETRY_COUNT,
+        metrics=None,
+    ):
+        """
+        max_concurrency: max requests in flight at once, extra calls wait their turn
+        limit_per_host: max open connections to the API host
+        keep_alive: reuse connections between requests
+        rate_limit: max requests per second across all the coroutines using the client
+        rate_limiter: harmonic.ratelimit.RateLimiter to share with other clients, overrides rate_limit
+        max_retries: attempts per request on 429, 5xx and connection errors
+        metrics: harmonic.metrics.HarmonicMetrics to share with other clients
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncHarmonicClient requires aiohttp, install it with `pip install aiohttp`"
+            )
+        self.API_KEY = API_KEY
+        self._set_api_endpoint()
+        self._max_concurrency = max_concurrency
+        self._limit_per_host = limit_per_host
+        self._keep_alive = keep_alive
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client_session = None
+        self.rate_limiter = rate_limiter or RateLimiter(rate_limit)
+        self.max_retries = max_retries
+        self.metrics = metrics or HarmonicMetrics()
+
+    def _set_api_endpoint(self, api_endpoint=None):
+        if api_endpoint:
+            self.API_ENDPOINT = api_endpoint
+        else:
+            self.API_ENDPOINT = HARMONIC_CONSUMER_API_ENDPOINT
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        if self._client_session is not None:
+            await self._client_session.close()
+            self._client_session = None
+
+    def _session(self):
+        # aiohttp sessions have to be created inside the running loop
+        if self._client_session is None or self._client_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._max_concurrency,
+                limit_per_host=self._limit_per_host,
+                force_close=not self._keep_alive,
+            )
+            self._client_session = aiohttp.ClientSession(connector=connector)
+        return self._client_session
+
+    async def _request(self, method, url, params=None, json=None):
+        endpoint = endpoint_name(url, self.API_ENDPOINT)
+        with self.metrics.span(
+            f"{method.upper()} {endpoint}", **{"http.method": method, "http.route": endpoint}
+        ) as span:
+            attempt = 0
+            while True:
+                await self.rate_limiter.acquire_async()
+                start = time.perf_counter()
+                try:
+                    async with self._semaphore:
+                        start = time.perf_counter()
+                        async with self._session().request(
+                            method, url, params=_query_params(params), json=json
+                        ) as res:
+                            span.set_attribute("http.status_code", res.status)
+                            if res.status == 200:
+                                self.rate_limiter.on_success()
+                                body = await res.read()
+                                self._observe(endpoint, method, res.status, start, len(body))
+                                return await res.json(content_type=None)
+                            error = await self._response_error(res, url)
+                            body = await res.read()
+                            self._observe(endpoint, method, res.status, start, len(body))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    self._observe(endpoint, method, "error", start)
+                    error = connection_error(e, url)
+                attempt += 1
+                if attempt >= self.max_retries or not is_retryable(error):
+                    raise error
+                span.set_attribute("harmonic.retries", attempt)
+                self.metrics.observe_retry(endpoint, error)
+                logger.warning("%s %s", HARMONIC_CONSUMER_API_RETRYING_MSG, error)
+                await self._wait_before_retry(attempt, error)
+
+    def _observe(self, endpoint, method, status, start, response_bytes=0, records=None):
+        self.metrics.observe(
+            endpoint,
+            method,
+            status,
+            time.perf_counter() - start,
+            response_bytes=response_bytes,
+            records=records,
+        )
+
+    async def _response_error(self, res, url):
+        text = await res.text()
+        error = api_error(res.status, lambda: json.loads(text), url, res.headers)
+        if isinstance(error, HarmonicRateLimitError):
+            self.rate_limiter.on_rate_limited(error.retry_after)
+        return error
+
+    async def _wait_before_retry(self, attempt, error):
+        # after a Retry-After the shared rate limiter already holds every caller back
+        if not (isinstance(error, HarmonicRateLimitError) and error.retry_after):
+            await asyncio.sleep(retry_delay(attempt))
+
+    # [ENRICH](https://console.harmonic.ai/docs/api-reference/enrich)
+    async def enrich_company(self, url_or_enrichment_request, default_type=None):
+        """[Enrich a company **POST**](https://console.harmonic.ai/docs/api-reference/enrich#enrich-a-company)"""
+        params = {
+            "apikey": self.API_KEY,
+            **company_enrichment_params(url_or_enrichment_request, default_type),
+        }
+        API_URL = f"{self.API_ENDPOINT}/companies"
+        return await self._request("post", API_URL, params=params)
+
+    async def enrich_person(self, url):
+        """[Enrich a person **POST**](https://console.harmonic.ai/docs/api-reference/enrich#enrich-a-person)"""
+        params = {
+            "apikey": self.API_KEY,
+            "linkedin_url": url,
+        }
+        API_URL = f"{self.API_ENDPOINT}/persons"
+        return await self._request("post", API_URL, params=params)
+
+    # [DISCOVER](https://console.harmonic.ai/docs/api-reference/discover#discover)
+    async def get_saved_searches(self):
+        """[Get saved searches **GET**](https://console.harmonic.ai/docs/api-reference/discover#get-saved-searches)"""
+        API_URL = f"{self.API_ENDPOINT}/savedSearches"
+        return await self._request("get", API_URL, params={"apikey": self.API_KEY})
+
+    async def get_saved_searches_by_owner(self):
+        API_URL = f"{self.API_ENDPOINT}/saved_searches"
+        return await self._request("get", API_URL, params={"apikey": self.API_KEY})
+
+    async def iter_saved_search_results(self, saved_search_id, page_size=100):
+        """async generator over all the results of a saved search
+
+        async for company in client.iter_saved_search_results(saved_search_id):
+            ...
+        """
+        API_URL = f"{self.API_ENDPOINT}/saved_searches:results/{saved_search_id}"
+        endpoint = endpoint_name(API_URL, self.API_ENDPOINT)
+        page = 0
+        page_error_count = 0
+        while True:
+            await self.rate_limiter.acquire_async()
+            start = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    async with self._session().get(
+                        API_URL,
+                        params={"page": page, "size": page_size, "apikey": self.API_KEY},
+                    ) as response:
+                        if response.status == 200:
+                            self.rate_limiter.on_success()
+                            body = await response.read()
+                            res = json.loads(body)
+                            self._observe(
+                                endpoint, "get", 200, start, len(body), len(res["results"])
+                            )
+                        else:
+                            res = None
+                            error = await self._response_error(response, API_URL)
+                            body = await response.read()
+                            self._observe(endpoint, "get", response.status, start, len(body))
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError) as e:
+                self._observe(endpoint, "get", "error", start)
+                res = None
+                error = connection_error(e, API_URL)
+
+            if res is None:
+                page_error_count += 1
+                logger.warning("page %s: %s", page, error)
+                if page_error_count >= self.max_retries or not is_retryable(error):
+                    raise HarmonicPageError(
+                        f"page {page}: {HARMONIC_CONSUMER_API_ERROR_MSG}",
+                        status_code=error.status_code,
+                        url=error.url,
+                        body=error.body,
+                    ) from error
+                logger.warning("page %s: %s", page, HARMONIC_CONSUMER_API_RETRYING_MSG)
+                self.metrics.observe_retry(endpoint, error)
+                await self._wait_before_retry(page_error_count, error)
+                continue
+
+            if not res["results"]:
+                return
+            for record in res["results"]:
+                yield record
+            page += 1
+            page_error_count = 0
+
+    async def get_saved_search_results(
+        self, saved_search_id, record_processor=None, page_size=100, include=None
+    ):
+        """[Get saved search results **GET**](https://console.harmonic.ai/docs/api-reference/discover#get-saved-search-results)
+
+        record_processor can be a plain function or a coroutine function
+        include: relations attached to every company before record_processor, see hydrate_companies
+        """
+        total_result_count = 0
+        try:
+            records = self.iter_saved_search_results(saved_search_id, page_size=page_size)
+            if include:
+                records = self.iter_hydrated_companies(
+                    records, include=include, batch_size=page_size
+                )
+            async for record in records:
+                total_result_count += 1
+                if record_processor and callable(record_processor):
+                    processed = record_processor(record)
+                    if asyncio.iscoroutine(processed):
+                        await processed
+        except HarmonicPageError as e:
+            logger.error(e)
+            return
+        logger.info(
+            "COMPLETE: search %s generated %s results", saved_search_id, total_result_count
+        )
+
+    async def search(
+        self, keywords_or_query, page=0, page_size=50, include_results=True
+    ):
+        """[Conduct a search **POST**](https://console.harmonic.ai/docs/api-reference/discover#conduct-a-search)"""
+        API_URL, body = search_request(
+            self.API_ENDPOINT, keywords_or_query, page, page_size, include_results
+        )
+        return await self._request(
+            "post", API_URL, params={"apikey": self.API_KEY}, json=body
+        )
+
+    async def iter_search(
+        self,
+        keywords_or_query,
+        page_size=50,
+        prefetch=HARMONIC_CONSUMER_API_MAX_WORKERS,
+        include_results=True,
+        hydrate=False,
+    ):
+        """async generator over every result of a search, in order
+
+        The first page gives the total count, then up to prefetch pages are in
+        flight at once. include_results=False yields company URNs, hydrate=True
+        searches for URNs only and fetches their companies in batches.
+        """
+        include_results = include_results and not hydrate
+        first = await self.search(keywords_or_query, 0, page_size, include_results)
+        count = first.get("count")
+        in_flight = collections.deque()
+        next_page = 1
+        results = first["results"]
+        try:
+            while True:
+                page_result_count = len(results)
+                if hydrate and all(isinstance(result, str) for result in results):
+                    companies = await self.get_companies_by_ids(results, isURN=True)
+                    results = [company for company in companies if company is not None]
+                for result in results:
+                    yield result
+                if count is None:
+                    # no total, page one by one until a short page
+                    if page_result_count < page_size:
+                        return
+                    in_flight.append(
+                        asyncio.ensure_future(
+                            self.search(keywords_or_query, next_page, page_size, include_results)
+                        )
+                    )
+                    next_page += 1
+                else:
+                    while next_page * page_size < count and len(in_flight) < prefetch:
+                        in_flight.append(
+                            asyncio.ensure_future(
+                                self.search(
+                                    keywords_or_query, next_page, page_size, include_results
+                                )
+                            )
+                        )
+                        next_page += 1
+                if not in_flight:
+                    return
+                results = (await in_flight.popleft())["results"]
+                if not results:
+                    return
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    # [FETCH](https://console.harmonic.ai/docs/api-reference/fetch#fetch)
+    async def get_company_by_id(self, id):
+        """[Get company by ID **GET**](https://console.harmonic.ai/docs/api-reference/fetch#get-company-by-id)"""
+        API_URL = f"{self.API_ENDPOINT}/companies/{id}"
+        return await self._request("get", API_URL, params={"apikey": self.API_KEY})
+
+    async def get_companies_by_ids(
+        self, ids, isURN=False, chunk_size=HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST
+    ):
+        """[Get companies by ID **GET**](https://console.harmonic.ai/docs/api-reference/fetch#get-companies-by-id)
+
+        Returns one entry per input id, in input order, None when the company is not found.
+        """
+        API_URL = f"{self.API_ENDPOINT}/companies"
+        return await self._get_by_ids(API_URL, ids, isURN, chunk_size)
+
+    async def get_person_by_id(self, id):
+        """[Get person by ID **GET**](https://console.harmonic.ai/docs/api-reference/fetch#get-person-by-id)"""
+        API_URL = f"{self.API_ENDPOINT}/persons/{id}"
+        return await self._request("get", API_URL, params={"apikey": self.API_KEY})
+
+    async def get_persons_by_ids(
+        self, ids, isURN=False, chunk_size=HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST
+    ):
+        """[Get persons by ID **GET](https://console.harmonic.ai/docs/api-reference/fetch#get-persons-by-id)
+
+        Returns one entry per input id, in input order, None when the person is not found.
+        """
+        API_URL = f"{self.API_ENDPOINT}/persons"
+        return await self._get_by_ids(API_URL, ids, isURN, chunk_size)
+
+    async def _get_by_ids(self, API_URL, ids, isURN, chunk_size):
+        responses = await asyncio.gather(
+            *[
+                self._request(
+                    "get",
+                    API_URL,
+                    params={("urns" if isURN else "ids"): chunk, "apikey": self.API_KEY},
+                )
+                for chunk in id_chunks(ids, chunk_size)
+            ]
+        )
+        return match_by_ids(ids, isURN, responses)
+
+    # HYDRATE
+    async def hydrate_companies(
+        self, companies, include=HARMONIC_CONSUMER_API_HYDRATION_INCLUDES
+    ):
+        """attaches the records the companies point to, fetched in bulk, see HarmonicClient.hydrate_companies"""
+        companies = list(companies)
+        if "people" in hydration_includes(include):
+            urns = person_urns(companies)
+            persons = await self.get_persons_by_ids(urns, isURN=True)
+            companies = attach_people(companies, dict(zip(urns, persons)))
+        return companies
+
+    async def iter_hydrated_companies(
+        self, companies, include=HARMONIC_CONSUMER_API_HYDRATION_INCLUDES, batch_size=100
+    ):
+        """async generator over companies (an async iterable) hydrated batch_size at a time"""
+        hydration_includes(include)
+        batch = []
+        async for company in companies:
+            batch.append(company)
+            if len(batch) >= batch_size:
+                for hydrated in await self.hydrate_companies(batch, include):
+                    yield hydrated
+                batch = []
+        if batch:
+            for hydrated in await self.hydrate_companies(batch, include):
+                yield hydrated
+
+    # [WATCHLIST](https://console.harmonic.ai/docs/api-reference/watchlist#watchlist)
+    async def set_watchlist(
+        self,
+        watchlist_id,
+        name=None,
+        companies=None,
+        shared_with_team=None,
+    ):
+        """[Modify a Watchlist **PUT**](https://console.harmonic.ai/docs/api-reference/watchlist#modify-company-watchlist)"""
+        API_URL = f"{self.API_ENDPOINT}/watchlists/companies/{watchlist_id}"
+        body = {}
+        if name is not None and isinstance(name, str):
+            body["name"] = name
+        if companies is not None and isinstance(companies, list):
+            body["companies"] = companies
+        if shared_with_team is not None and isinstance(shared_with_team, bool):
+            body["shared_with_team"] = shared_with_team
+        # PUT replaces the whole watchlist: without companies its current
+        # membership is sent back, metadata alone comes from the listing
+        wl = None
+        if "companies" not in body:
+            wl = await self.get_watchlist_by_id(watchlist_id)
+            body["companies"] = [c["entity_urn"] for c in wl["companies"]]
+        elif "name" not in body or "shared_with_team" not in body:
+            wl = await self._get_watchlist_metadata(watchlist_id)
+        if wl is not None:
+            body.setdefault("name", wl["name"])
+            body.setdefault("shared_with_team", wl["shared_with_team"])
+        return await self._request(
+            "put", API_URL, params={"apikey": self.API_KEY}, json=body
+        )
+
+    async def delete_watchlist(self, watchlist_id):
+        """[Delete a Watchlist **DELETE**](https://console.harmonic.ai/docs/api-reference/watchlist#delete-company-watchlist)"""
+        API_URL = f"{self.API_ENDPOINT}/watchlists/companies/{watchlist_id}"
+        return await self._request("delete", API_URL, params={"apikey": self.API_KEY})
+
+    async def get_watchlists(self):
+        API_URL = f"{self.API_ENDPOINT}/watchlists/companies"
+        return await self._request("get", API_URL, params={"apikey": self.API_KEY})
+
+    async def get_watchlist_by_id(self, watchlist_id):
+        """[Get Company Watchlist **GET**](https://console.harmonic.ai/docs/api-reference/watchlist#get-company-watchlist)"""
+        API_URL = f"{self.API_ENDPOINT}/watchlists/companies/{watchlist_id}"
+        return await self._request("get", API_URL, params={"apikey": self.API_KEY})
+
+    async def _get_watchlist_metadata(self, watchlist_id):
+        """name and sharing of a watchlist without downloading its companies when possible"""
+        watchlist = find_watchlist(await self.get_watchlists(), watchlist_id)
+        return watchlist or await self.get_watchlist_by_id(watchlist_id)
+
+    async def add_company_to_watchlist(self, watchlist_id, company_ids, isURN=False):
+        """[Add Companies to Watchlist **POST**](https://console.harmonic.ai/docs/api-reference/watchlist#add-companies-to-watchlist)"""
+        API_URL = (
+            f"{self.API_ENDPOINT}/watchlists/companies/{watchlist_id}:addCompanies"
+        )
+        return await self._request(
+            "post",
+            API_URL,
+            params={"apikey": self.API_KEY},
+            json={("urns" if isURN else "ids"): company_ids},
+        )
+
+    async def add_company_to_watchlist_by_urls(self, watchlist_id, company_urls):
+        """[Add Companies to Watchlist **POST**](https://console.harmonic.ai/docs/api-reference/watch#add-companies-to-watchlist-by-urls)"""
+        API_URL = (
+            f"{self.API_ENDPOINT}/watchlists/companies/{watchlist_id}:addCompaniesByUrls"
+        )
+        return await self._request(
+            "post",
+            API_URL,
+            params={"apikey": self.API_KEY},
+            json=company_urls,
+        )
+
+    async def remove_company_from_watchlist(
+        self, watchlist_id, company_ids, isURN=False
+    ):
+        """[Remove Companies from Watchlist **POST**](https://console.harmonic.ai/docs/api-reference/watchlist#remove-companies-from-watchlist)"""
+        API_URL = (
+            f"{self.API_ENDPOINT}/watchlists/companies/{watchlist_id}:removeCompanies"
+        )
+        return await self._request(
+            "post",
+            API_URL,
+            params={"apikey": self.API_KEY},
+            json={("urns" if isURN else "ids"): company_ids},
+        )
+
+    async def sync_watchlist(
+        self,
+        watchlist_id,
+        desired_urns,
+        chunk_size=HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST,
+    ):
+        """make the watchlist hold exactly desired_urns with the fewest changes
+
+        Returns {"added": [...], "removed": [...]}.
+        """
+        watchlist = await self.get_watchlist_by_id(watchlist_id)
+        to_add, to_remove = watchlist_diff(watchlist, desired_urns)
+        await asyncio.gather(
+            *[
+                self.add_company_to_watchlist(watchlist_id, chunk, isURN=True)
+                for chunk in id_chunks(to_add, chunk_size)
+            ],
+            *[
+                self.remove_company_from_watchlist(watchlist_id, chunk, isURN=True)
+                for chunk in id_chunks(to_remove, chunk_size)
+            ],
+        )
+        return {"added": to_add, "removed": to_remove}
+
+
+def _query_params(params):
+    """aiohttp does not expand list values like requests does, use (key, value) pairs"""
+    if not params:
+        return params
+    pairs = []
+    for key, value in params.items():
+        if isinstance(value, (list, tuple)):
+            pairs.extend((key, str(v)) for v in value)
+        else:
+            pairs.append((key, str(value)))
+    return pairs
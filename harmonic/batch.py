@@ -0,0 +1,414 @@
+import math
+import operator
+from array import array
+from collections.abc import Mapping
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# field path -> column type, "category" interns repeated strings into integer codes
+COMPANY_BATCH_FIELDS = {
+    "id": "int",
+    "entity_urn": "str",
+    "name": "str",
+    "website.domain": "str",
+    "headcount": "int",
+    "stage": "category",
+    "funding.funding_stage": "category",
+    "funding.funding_total": "float",
+    "location.country": "category",
+}
+PERSON_BATCH_FIELDS = {
+    "id": "int",
+    "entity_urn": "str",
+    "full_name": "str",
+    "socials.LINKEDIN.url": "str",
+    "location.country": "category",
+}
+
+_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def get_path(record, path):
+    """value at a dotted path of a nested record, None when any part is missing"""
+    value = record
+    for key in path.split("."):
+        if not isinstance(value, (dict, Mapping)):
+            return None
+        value = value.get(key)
+    return value
+
+
+class _IntColumn:
+    """int64 values, nulls kept in a byte mask"""
+
+    def __init__(self):
+        self.values = array("q")
+        self.nulls = bytearray()
+
+    def append(self, value):
+        if isinstance(value, (int, float)) and not (
+            isinstance(value, float) and math.isnan(value)
+        ):
+            self.values.append(int(value))
+            self.nulls.append(0)
+        else:
+            self.values.append(0)
+            self.nulls.append(1)
+
+    def __getitem__(self, i):
+        return None if self.nulls[i] else self.values[i]
+
+    def take(self, indices):
+        column = _IntColumn()
+        if np is not None:
+            column.values.frombytes(np.frombuffer(self.values, dtype=np.int64)[indices].tobytes())
+            column.nulls = bytearray(np.frombuffer(self.nulls, dtype=np.uint8)[indices].tobytes())
+        else:
+            column.values = array("q", (self.values[i] for i in indices))
+            column.nulls = bytearray(self.nulls[i] for i in indices)
+        return column
+
+    def to_numpy(self):
+        # copies, a view would stop the column from growing
+        values = np.frombuffer(self.values, dtype=np.int64).copy()
+        if any(self.nulls):
+            return np.ma.masked_array(values, mask=np.frombuffer(self.nulls, dtype=bool).copy())
+        return values
+
+    def to_list(self):
+        return [self[i] for i in range(len(self.values))]
+
+    @property
+    def nbytes(self):
+        return self.values.itemsize * len(self.values) + len(self.nulls)
+
+
+class _FloatColumn:
+    """float64 values, nulls are NaN"""
+
+    def __init__(self):
+        self.values = array("d")
+
+    def append(self, value):
+        self.values.append(float(value) if isinstance(value, (int, float)) else math.nan)
+
+    def __getitem__(self, i):
+        value = self.values[i]
+        return None if math.isnan(value) else value
+
+    def take(self, indices):
+        column = _FloatColumn()
+        if np is not None:
+            column.values.frombytes(np.frombuffer(self.values, dtype=np.float64)[indices].tobytes())
+        else:
+            column.values = array("d", (self.values[i] for i in indices))
+        return column
+
+    def to_numpy(self):
+        return np.frombuffer(self.values, dtype=np.float64).copy()
+
+    def to_list(self):
+        return [self[i] for i in range(len(self.values))]
+
+    @property
+    def nbytes(self):
+        return self.values.itemsize * len(self.values)
+
+
+class _StringColumn:
+    """utf-8 bytes of every value in one buffer plus offsets, like an Arrow string array"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+        self.nulls = bytearray()
+
+    def append(self, value):
+        if value is None:
+            self.nulls.append(1)
+        else:
+            self.data += str(value).encode()
+            self.nulls.append(0)
+        self.offsets.append(len(self.data))
+
+    def __getitem__(self, i):
+        if self.nulls[i]:
+            return None
+        return self.data[self.offsets[i] : self.offsets[i + 1]].decode()
+
+    def take(self, indices):
+        column = _StringColumn()
+        for i in indices:
+            column.data += self.data[self.offsets[i] : self.offsets[i + 1]]
+            column.offsets.append(len(column.data))
+            column.nulls.append(self.nulls[i])
+        return column
+
+    def to_numpy(self):
+        return np.array(self.to_list(), dtype=object)
+
+    def to_list(self):
+        return [self[i] for i in range(len(self.nulls))]
+
+    @property
+    def nbytes(self):
+        return len(self.data) + self.offsets.itemsize * len(self.offsets) + len(self.nulls)
+
+
+class _CategoryColumn:
+    """int32 codes into a list of distinct values, -1 for nulls"""
+
+    def __init__(self, categories=None):
+        self.codes = array("i")
+        self.categories = list(categories or [])
+        self._index = {value: code for code, value in enumerate(self.categories)}
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(-1)
+            return
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes.append(code)
+
+    def code(self, value):
+        return self._index.get(value, -2)  # -2 never matches, not even nulls
+
+    def __getitem__(self, i):
+        code = self.codes[i]
+        return None if code < 0 else self.categories[code]
+
+    def take(self, indices):
+        column = _CategoryColumn(self.categories)
+        if np is not None:
+            column.codes.frombytes(np.frombuffer(self.codes, dtype=np.int32)[indices].tobytes())
+        else:
+            column.codes = array("i", (self.codes[i] for i in indices))
+        return column
+
+    def to_numpy(self):
+        return np.array(self.to_list(), dtype=object)
+
+    def to_list(self):
+        return [self[i] for i in range(len(self.codes))]
+
+    @property
+    def nbytes(self):
+        return self.codes.itemsize * len(self.codes)
+
+
+_COLUMN_TYPES = {
+    "int": _IntColumn,
+    "float": _FloatColumn,
+    "str": _StringColumn,
+    "category": _CategoryColumn,
+}
+
+
+class RecordBatch:
+    """compact columnar copy of chosen fields of many records
+
+    batch = CompanyBatch.from_pages(pages)
+    series_a = batch.filter(batch.where("funding.funding_stage", "==", "SERIES_A"))
+    df = series_a.select(["name", "website.domain"]).to_pandas()
+
+    Columns are typed arrays (viewed as NumPy arrays when it is installed),
+    strings share one buffer per column and categorical values are interned.
+    """
+
+    DEFAULT_FIELDS = {}
+
+    def __init__(self, fields=None):
+        self.fields = dict(fields or self.DEFAULT_FIELDS)
+        for field_type in self.fields.values():
+            if field_type not in _COLUMN_TYPES:
+                raise ValueError(f"field type has to be one of {list(_COLUMN_TYPES)}")
+        self.columns = {
+            path: _COLUMN_TYPES[field_type]() for path, field_type in self.fields.items()
+        }
+        self._length = 0
+
+    @classmethod
+    def from_records(cls, records, fields=None):
+        batch = cls(fields)
+        batch.extend(records)
+        return batch
+
+    @classmethod
+    def from_pages(cls, pages, fields=None):
+        """pages are lists of records or API responses with a "results" list"""
+        batch = cls(fields)
+        for page in pages:
+            batch.extend(page["results"] if isinstance(page, dict) else page)
+        return batch
+
+    def append(self, record):
+        for path, column in self.columns.items():
+            column.append(get_path(record, path))
+        self._length += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, path):
+        """whole column, a NumPy array when it is installed else a list"""
+        return self.column(path)
+
+    def column(self, path):
+        column = self.columns[path]
+        return column.to_numpy() if np is not None else column.to_list()
+
+    def row(self, i):
+        return {path: column[i] for path, column in self.columns.items()}
+
+    def rows(self):
+        for i in range(self._length):
+            yield self.row(i)
+
+    def where(self, path, op, value=None):
+        """boolean mask of the rows matching `column op value`
+
+        op is one of ==, !=, <, <=, >, >=, "in", "isnull", "notnull"
+        Only "isnull" matches nulls, every comparison (!= included) is false for them.
+        """
+        column = self.columns[path]
+        if op in ("isnull", "notnull"):
+            mask = [column[i] is None for i in range(self._length)]
+            if op == "notnull":
+                mask = [not m for m in mask]
+            return np.array(mask, dtype=bool) if np is not None else mask
+
+        if isinstance(column, _CategoryColumn) and op in ("==", "!=", "in"):
+            # compare integer codes instead of strings
+            wanted = value if op == "in" else [value]
+            codes = {column.code(v) for v in wanted}
+            if np is not None:
+                all_codes = np.frombuffer(column.codes, dtype=np.int32)
+                mask = np.isin(all_codes, list(codes))
+                return ~mask & (all_codes >= 0) if op == "!=" else mask
+            if op == "!=":
+                return [code >= 0 and code not in codes for code in column.codes]
+            return [code in codes for code in column.codes]
+
+        if np is not None and isinstance(column, (_IntColumn, _FloatColumn)) and op != "in":
+            values = np.frombuffer(
+                column.values,
+                dtype=np.int64 if isinstance(column, _IntColumn) else np.float64,
+            )
+            mask = _OPERATORS[op](values, value)
+            if isinstance(column, _IntColumn):
+                mask &= np.frombuffer(column.nulls, dtype=np.uint8) == 0
+            else:
+                mask &= ~np.isnan(values)
+            return mask
+
+        if op == "in":
+            wanted = set(value)
+            mask = []
+            for i in range(self._length):
+                v = column[i]
+                mask.append(v is not None and v in wanted)
+        else:
+            compare = _OPERATORS[op]
+            mask = []
+            for i in range(self._length):
+                v = column[i]
+                mask.append(v is not None and compare(v, value))
+        return np.array(mask, dtype=bool) if np is not None else mask
+
+    def filter(self, mask):
+        """new batch with the rows where mask is true"""
+        if np is not None:
+            indices = np.flatnonzero(np.asarray(mask, dtype=bool))
+        else:
+            indices = [i for i, keep in enumerate(mask) if keep]
+        return self.take(indices)
+
+    def take(self, indices):
+        """new batch with the rows at indices, in that order"""
+        batch = self.__class__.__new__(self.__class__)
+        batch.fields = dict(self.fields)
+        batch.columns = {path: column.take(indices) for path, column in self.columns.items()}
+        batch._length = len(indices)
+        return batch
+
+    def select(self, paths):
+        """new batch with only the given columns, sharing their data with this batch"""
+        batch = self.__class__.__new__(self.__class__)
+        batch.fields = {path: self.fields[path] for path in paths}
+        batch.columns = {path: self.columns[path] for path in paths}
+        batch._length = self._length
+        return batch
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+    def to_pandas(self):
+        import pandas as pd
+
+        data = {}
+        for path, column in self.columns.items():
+            if isinstance(column, _CategoryColumn):
+                data[path] = pd.Categorical.from_codes(
+                    np.frombuffer(column.codes, dtype=np.int32),
+                    categories=column.categories,
+                )
+            elif isinstance(column, _IntColumn):
+                data[path] = pd.array(column.to_list(), dtype="Int64")
+            elif isinstance(column, _FloatColumn):
+                data[path] = column.to_numpy()
+            else:
+                data[path] = column.to_list()
+        return pd.DataFrame(data)
+
+    def to_arrow(self):
+        import pyarrow as pa
+
+        arrays = []
+        for column in self.columns.values():
+            if isinstance(column, _CategoryColumn):
+                codes = np.frombuffer(column.codes, dtype=np.int32).copy()
+                arrays.append(
+                    pa.DictionaryArray.from_arrays(
+                        pa.array(codes, mask=codes < 0),
+                        pa.array(column.categories, type=pa.string()),
+                    )
+                )
+            elif isinstance(column, _IntColumn):
+                arrays.append(
+                    pa.array(
+                        column.to_numpy().data,
+                        mask=np.frombuffer(column.nulls, dtype=bool).copy(),
+                    )
+                )
+            elif isinstance(column, _FloatColumn):
+                values = column.to_numpy()
+                arrays.append(pa.array(values, mask=np.isnan(values)))
+            else:
+                arrays.append(pa.array(column.to_list(), type=pa.large_string()))
+        return pa.Table.from_arrays(arrays, names=list(self.columns))
+
+
+class CompanyBatch(RecordBatch):
+    DEFAULT_FIELDS = COMPANY_BATCH_FIELDS
+
+
+class PersonBatch(RecordBatch):
+    DEFAULT_FIELDS = PERSON_BATCH_FIELDS
@@ -0,0 +1,204 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+HARMONIC_CACHE_MAX_ENTRIES = 10000
+HARMONIC_CACHE_DEFAULT_TTL = 24 * 60 * 60  # 1 day, in seconds
+HARMONIC_CACHE_TTLS = {
+    "company": HARMONIC_CACHE_DEFAULT_TTL,
+    "person": HARMONIC_CACHE_DEFAULT_TTL,
+}
+
+
+class LRUCache:
+    """size bounded in-memory tier, least recently used records are evicted first
+
+    A record stored under several keys (set_many) is a single entry, so
+    max_entries and evictions count records, not keys.
+    """
+
+    def __init__(self, max_entries=HARMONIC_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        # first key -> (expires_at, value, keys), every key -> its entry's first key
+        self._entries = OrderedDict()
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, now=None):
+        with self._lock:
+            first_key = self._keys.get(key)
+            if first_key is None:
+                return None
+            expires_at, value, _ = self._entries[first_key]
+            if expires_at <= (now or time.time()):
+                self._remove(first_key)
+                return None
+            self._entries.move_to_end(first_key)
+            return value
+
+    def set(self, key, value, expires_at):
+        self.set_many((key,), value, expires_at)
+
+    def set_many(self, keys, value, expires_at):
+        """one entry found by any of keys, it replaces the entries of those keys and takes over their other keys"""
+        keys = dict.fromkeys(keys)
+        with self._lock:
+            for key in list(keys):
+                first_key = self._keys.get(key)
+                if first_key is not None:
+                    keys.update(dict.fromkeys(self._remove(first_key)))
+            keys = tuple(keys)
+            self._entries[keys[0]] = (expires_at, value, keys)
+            for key in keys:
+                self._keys[key] = keys[0]
+            while len(self._entries) > self.max_entries:
+                _, (_, _, evicted_keys) = self._entries.popitem(last=False)
+                for key in evicted_keys:
+                    del self._keys[key]
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            first_key = self._keys.get(key)
+            if first_key is not None:
+                self._remove(first_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, first_key):
+        """keys of the removed entry"""
+        _, _, keys = self._entries.pop(first_key)
+        for key in keys:
+            del self._keys[key]
+        return keys
+
+
+class SQLiteCache:
+    """persistent tier, records are stored as JSON text next to their expiry time"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+
+    def get(self, key, now=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None, None
+        value, expires_at = row
+        if expires_at <= (now or time.time()):
+            self.delete(key)
+            return None, None
+        return json.loads(value), expires_at
+
+    def set_many(self, keys, value, expires_at):
+        data = json.dumps(value)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, data, expires_at) for key in keys],
+            )
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def purge_expired(self, now=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (now or time.time(),)
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class HarmonicCache:
+    """two tier entity cache for HarmonicClient(cache=HarmonicCache(...))
+
+    Records are looked up in memory first, then in SQLite when a path is given,
+    and expire after the TTL of their entity type ("company", "person").
+    Records returned from the memory tier are shared, do not mutate them.
+    max_entries is the number of records kept in memory, whatever the number
+    of keys they are found by.
+    """
+
+    def __init__(
+        self, max_entries=HARMONIC_CACHE_MAX_ENTRIES, path=None, ttls=None
+    ):
+        self.memory = LRUCache(max_entries)
+        self.disk = SQLiteCache(path) if path else None
+        self.ttls = {**HARMONIC_CACHE_TTLS, **(ttls or {})}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, entity_type, key):
+        cache_key = f"{entity_type}:{key}"
+        now = time.time()
+        value = self.memory.get(cache_key, now)
+        if value is not None:
+            with self._stats_lock:
+                self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            value, expires_at = self.disk.get(cache_key, now)
+            if value is not None:
+                with self._stats_lock:
+                    self.disk_hits += 1
+                self.memory.set(cache_key, value, expires_at)
+                return value
+        with self._stats_lock:
+            self.misses += 1
+        return None
+
+    def set(self, entity_type, keys, value):
+        """store value under every key identifying it"""
+        cache_keys = [f"{entity_type}:{key}" for key in dict.fromkeys(keys)]
+        expires_at = time.time() + self.ttls.get(entity_type, HARMONIC_CACHE_DEFAULT_TTL)
+        self.memory.set_many(cache_keys, value, expires_at)
+        if self.disk is not None:
+            self.disk.set_many(cache_keys, value, expires_at)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+    def stats(self):
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.memory.evictions,
+            "memory_entries": len(self.memory),
+        }
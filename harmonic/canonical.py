@@ -0,0 +1,197 @@
+import re
+from functools import lru_cache
+from urllib.parse import unquote
+
+HARMONIC_CANONICAL_CACHE_SIZE = 2**18  # distinct urls remembered
+
+# root domain -> company url type, subdomains (uk.linkedin.com, m.facebook.com,
+# mobile.twitter.com) match their root domain
+PROFILE_DOMAINS = {
+    "linkedin.com": "linkedin_url",
+    "twitter.com": "twitter_url",
+    "x.com": "twitter_url",
+    "crunchbase.com": "crunchbase_url",
+    "pitchbook.com": "pitchbook_url",
+    "instagram.com": "instagram_url",
+    "facebook.com": "facebook_url",
+    "fb.com": "facebook_url",
+    "angel.co": "angellist_url",
+    "wellfound.com": "angellist_url",
+    "monster.com": "monster_url",
+    "indeed.com": "indeed_url",
+    "stackoverflow.com": "stackoverflow_url",
+    "glassdoor.com": "glassdoor_url",
+}
+
+# domains of the same site, keyed under the first one
+PROFILE_DOMAIN_ALIASES = {
+    "x.com": "twitter.com",
+    "fb.com": "facebook.com",
+    "wellfound.com": "angel.co",
+}
+
+# leading path segments naming the entity on a profile site, the rest is a
+# sub page (linkedin.com/company/acme/about, twitter.com/acme/status/1)
+PROFILE_PATH_SEGMENTS = {
+    "linkedin_url": 2,
+    "twitter_url": 1,
+    "crunchbase_url": 2,
+    "instagram_url": 1,
+    "facebook_url": 1,
+}
+
+# profile sites whose paths do not depend on case (linkedin.com/company/Acme
+# is linkedin.com/company/acme), the paths of every other site keep theirs
+CASE_INSENSITIVE_PATH_TYPES = (
+    "linkedin_url",
+    "twitter_url",
+    "crunchbase_url",
+    "instagram_url",
+    "facebook_url",
+    "angellist_url",
+)
+
+# first path segments of profile urls that hold the entity further down the
+# path or in the query (facebook.com/pages/acme/123, facebook.com/profile.php?id=123,
+# linkedin.com/pub/john-doe/1/23/456), these paths are kept whole
+PROFILE_CONTAINER_SEGMENTS = ("pages", "profile.php", "pub", "profile", "people", "groups")
+
+# query parameters naming the entity, the other ones are dropped
+ENTITY_QUERY_PARAMS = ("id",)
+
+# types keyed by their host alone, any path points to the same company except
+# on SHARED_HOSTS
+HOST_ONLY_TYPES = ("website_url", "website_domain")
+
+# hosts of many companies' websites (github.com/acme, medium.com/@acme), a
+# website on one of them or on a profile site is keyed by host and path
+SHARED_HOSTS = frozenset(
+    (
+        "github.com",
+        "gitlab.com",
+        "bitbucket.org",
+        "medium.com",
+        "sites.google.com",
+        "play.google.com",
+        "apps.apple.com",
+        "itunes.apple.com",
+        "producthunt.com",
+        "ycombinator.com",
+        "linktr.ee",
+        "about.me",
+        "youtube.com",
+        "t.me",
+    )
+)
+
+_WWW = re.compile(r"^www\d*\.")
+_QUERY_OR_FRAGMENT = re.compile(r"[?#]")
+
+
+def profile_url_type(host):
+    """company url type of a host by suffix match, None for non profile sites"""
+    root = _profile_root(host.lower().rstrip("."))
+    return PROFILE_DOMAINS[root] if root is not None else None
+
+
+def _split(url):
+    """(host, path segments, entity query) with www, port, fragment and trailing slash dropped
+
+    Only the host is lowercased, entity query is "" or the ENTITY_QUERY_PARAMS
+    of the url, e.g. "?id=123".
+    """
+    # hand rolled instead of urlsplit, this runs once per distinct input url
+    url = url.strip()
+    scheme_end = url.find("://")
+    if scheme_end >= 0:
+        url = url[scheme_end + 3 :]
+    else:
+        url = url.lstrip("/")  # scheme-less, e.g. linkedin.com/company/acme
+    if "#!" in url:
+        # hashbang paths, twitter.com/#!/acme is twitter.com/acme
+        url = url.replace("#!", "/", 1)
+    query = ""
+    cut = _QUERY_OR_FRAGMENT.search(url)
+    if cut is not None:
+        if url[cut.start()] == "?":
+            query = _entity_query(url[cut.start() + 1 :].partition("#")[0])
+        url = url[: cut.start()]
+    host, _, path = url.partition("/")
+    host = host.rpartition("@")[2]
+    if not host.endswith("]"):  # keep IPv6 literals whole
+        host = host.partition(":")[0]
+    host = _WWW.sub("", host.rstrip(".").lower())
+    if "%" in path:
+        path = unquote(path)
+    return host, tuple(segment for segment in path.split("/") if segment), query
+
+
+def _entity_query(query):
+    params = []
+    for param in query.split("&"):
+        name, _, value = param.partition("=")
+        name = name.lower()
+        if name in ENTITY_QUERY_PARAMS and value:
+            params.append(f"{name}={unquote(value)}")
+    return "?" + "&".join(sorted(params)) if params else ""
+
+
+def url_key(url_type, url):
+    """canonical key of url when it is used as url_type, the same for every spelling of it"""
+    return _canonicalize(url, url_type, None)[1]
+
+
+def canonicalize_url(url, default_type=None):
+    """(url type, canonical key) of a company url
+
+    The type comes from the domain, default_type (e.g. "website_url") is
+    used for the other domains, or the type is None without it.
+    """
+    return _canonicalize(url, None, default_type)
+
+
+def canonicalize_urls(urls, default_type=None):
+    """[(url type, canonical key)] of urls in input order
+
+    Every distinct url is parsed once, repeated ones are dictionary lookups.
+    """
+    canonicalize = _canonicalize
+    return [canonicalize(url, None, default_type) for url in urls]
+
+
+def group_by_entity(urls, default_type=None):
+    """{(url type, canonical key): [urls]} in first seen order, one entry per company"""
+    urls = list(urls)
+    groups = {}
+    for url, key in zip(urls, canonicalize_urls(urls, default_type)):
+        groups.setdefault(key, []).append(url)
+    return groups
+
+
+@lru_cache(maxsize=HARMONIC_CANONICAL_CACHE_SIZE)
+def _canonicalize(url, url_type, default_type):
+    host, segments, query = _split(url)
+    root = _profile_root(host)
+    if url_type is None:
+        url_type = PROFILE_DOMAINS[root] if root is not None else default_type
+    if url_type in HOST_ONLY_TYPES and root is None and host not in SHARED_HOSTS:
+        return url_type, host
+    if root is not None:
+        if PROFILE_DOMAINS[root] in CASE_INSENSITIVE_PATH_TYPES:
+            segments = tuple(segment.lower() for segment in segments)
+            query = query.lower()
+        if url_type not in HOST_ONLY_TYPES:
+            host = PROFILE_DOMAIN_ALIASES.get(root, root)
+            depth = PROFILE_PATH_SEGMENTS.get(url_type)
+            if depth is not None and not (segments and segments[0] in PROFILE_CONTAINER_SEGMENTS):
+                segments = segments[:depth]
+    return url_type, "/".join((host, *segments)) + query
+
+
+def _profile_root(host):
+    labels = host.split(".")
+    for i in range(len(labels) - 1):
+        root = ".".join(labels[i:])
+        if root in PROFILE_DOMAINS:
+            return root
+    return None
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import uuid
+from collections.abc import Mapping
+from enum import Enum
+
+HARMONIC_CHANGES_BATCH_SIZE = 500  # records looked up and written per statement
+
+
+def _default(value):
+    # harmonic.views.RecordView records and members
+    return dict(value) if isinstance(value, Mapping) else str(value)
+
+
+_encoder = json.JSONEncoder(sort_keys=True, separators=(",", ":"), default=_default)
+
+
+class CHANGE_TYPE(str, Enum):
+    Added = "added"
+    Changed = "changed"
+    Removed = "removed"
+
+
+class RecordChange:
+    """one added, changed or removed record of a tracked run
+
+    record is None for removed records, only their urn is known.
+    """
+
+    def __init__(self, type, urn, record=None):
+        self.type = type
+        self.urn = urn
+        self.record = record
+
+    def __repr__(self):
+        return f"RecordChange({self.type.value}, {self.urn!r})"
+
+
+class ChangeTracker:
+    """per entity_urn fingerprints of the records seen by the previous run
+
+    tracker = ChangeTracker("changes.sqlite", fields=["name", "headcount", "funding.funding_total"])
+    for change in tracker.track(saved_search_id, client.iter_saved_search_results(saved_search_id)):
+        ...
+
+    A fingerprint is an 8 byte blake2b digest of the tracked fields (dotted
+    paths, the whole record without fields). Fingerprints live in a SQLite
+    table ordered by (scope, urn) on disk, so a run holds one batch of them
+    in memory whatever the number of URNs. A run writes its fingerprints to a
+    staging table as it goes and replaces the previous run in one short
+    transaction once its records are exhausted; an interrupted run leaves the
+    previous one in place. Runs can overlap, from several threads or
+    processes, the last one to finish a scope wins.
+    """
+
+    def __init__(self, path, fields=None, batch_size=HARMONIC_CHANGES_BATCH_SIZE):
+        self.path = path
+        self.fields = tuple(fields) if fields else None
+        self._paths = [field.split(".") for field in self.fields or ()]
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # a commit per staged batch, without an fsync each; a crash can only
+            # lose the last runs, never corrupt the file
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                "scope TEXT NOT NULL, urn TEXT NOT NULL, fp BLOB NOT NULL, run INTEGER NOT NULL, "
+                "PRIMARY KEY (scope, urn)"
+                ") WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "scope TEXT PRIMARY KEY, run INTEGER NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            # fingerprints of the runs in progress, keyed by a token per run
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS staged ("
+                "token TEXT NOT NULL, urn TEXT NOT NULL, fp BLOB NOT NULL, "
+                "PRIMARY KEY (token, urn)"
+                ") WITHOUT ROWID"
+            )
+
+    def fingerprint(self, record):
+        """8 byte digest of the tracked fields of record"""
+        data = record if self.fields is None else [_get(record, path) for path in self._paths]
+        return hashlib.blake2b(_encoder.encode(data).encode(), digest_size=8).digest()
+
+    def track(self, scope, records):
+        """yields a RecordChange for every record of records that is new or changed
+        since the last run of scope, then one per urn that is no longer there
+
+        The first run of a scope reports every record as added.
+        """
+        scope = str(scope)
+        token = uuid.uuid4().hex
+        try:
+            batch = []
+            for record in records:
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    yield from self._track_batch(scope, token, batch)
+                    batch = []
+            if batch:
+                yield from self._track_batch(scope, token, batch)
+            yield from self._removed(scope, token)
+            self._commit(scope, token)
+        finally:
+            # includes GeneratorExit, a run that is not read to the end is not recorded
+            with self._lock:
+                self._conn.execute("DELETE FROM staged WHERE token = ?", (token,))
+
+    def count(self, scope):
+        """number of urns recorded by the last run of scope"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM fingerprints WHERE scope = ?", (str(scope),)
+            ).fetchone()[0]
+
+    def clear(self, scope=None):
+        with self._lock:
+            if scope is None:
+                self._conn.execute("DELETE FROM fingerprints")
+                self._conn.execute("DELETE FROM runs")
+                self._conn.execute("DELETE FROM staged")
+            else:
+                self._conn.execute("DELETE FROM fingerprints WHERE scope = ?", (str(scope),))
+                self._conn.execute("DELETE FROM runs WHERE scope = ?", (str(scope),))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _commit(self, scope, token):
+        # the only write transaction of a run, it swaps the staged fingerprints in
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT run FROM runs WHERE scope = ?", (scope,)
+                ).fetchone()
+                run = (row[0] if row else 0) + 1
+                self._conn.execute("DELETE FROM fingerprints WHERE scope = ?", (scope,))
+                self._conn.execute(
+                    "INSERT INTO fingerprints (scope, urn, fp, run) "
+                    "SELECT ?, urn, fp, ? FROM staged WHERE token = ?",
+                    (scope, run, token),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO runs (scope, run) VALUES (?, ?)", (scope, run)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _track_batch(self, scope, token, records):
+        fingerprints = {}
+        for record in records:
+            fingerprints[record["entity_urn"]] = (self.fingerprint(record), record)
+        urns = list(fingerprints)
+        placeholders = ",".join("?" * len(urns))
+        with self._lock:
+            previous = dict(
+                self._conn.execute(
+                    f"SELECT urn, fp FROM fingerprints WHERE scope = ? AND urn IN ({placeholders})",
+                    (scope, *urns),
+                )
+            )
+            # a record repeated within the run (results moving between pages) is
+            # compared with its earlier copy, so it is only reported again if it changed
+            previous.update(
+                self._conn.execute(
+                    f"SELECT urn, fp FROM staged WHERE token = ? AND urn IN ({placeholders})",
+                    (token, *urns),
+                )
+            )
+            # one short transaction per batch, not one per row
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO staged (token, urn, fp) VALUES (?, ?, ?)",
+                    [(token, urn, fp) for urn, (fp, _) in fingerprints.items()],
+                )
+        changes = []
+        for urn, (fp, record) in fingerprints.items():
+            previous_fp = previous.get(urn)
+            if previous_fp is None:
+                changes.append(RecordChange(CHANGE_TYPE.Added, urn, record))
+            elif previous_fp != fp:
+                changes.append(RecordChange(CHANGE_TYPE.Changed, urn, record))
+        return changes
+
+    def _removed(self, scope, token):
+        last_urn = ""
+        while True:
+            with self._lock:
+                urns = [
+                    urn
+                    for (urn,) in self._conn.execute(
+                        "SELECT urn FROM fingerprints AS f WHERE scope = ? AND urn > ? "
+                        "AND NOT EXISTS (SELECT 1 FROM staged WHERE token = ? AND urn = f.urn) "
+                        "ORDER BY urn LIMIT ?",
+                        (scope, last_urn, token, self.batch_size),
+                    )
+                ]
+            if not urns:
+                return
+            for urn in urns:
+                yield RecordChange(CHANGE_TYPE.Removed, urn)
+            last_urn = urns[-1]
+
+
+def _get(record, path):
+    # harmonic.batch.get_path with the path already split
+    value = record
+    for key in path:
+        if not isinstance(value, (dict, Mapping)):
+            return None
+        value = value.get(key)
+    return value
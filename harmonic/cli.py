@@ -0,0 +1,387 @@
+"""harmonic command line
+
+harmonic enrich --input urls.csv --output companies.jsonl
+harmonic enrich --input people.txt --type person --output people.csv --concurrency 16 --resume
+harmonic export-search urn:harmonic:saved_search:1 --output results.jsonl.gz --compression gzip
+harmonic watchlist-sync <watchlist id> --input urns.csv
+
+Inputs and outputs are streamed, "-" is stdin / stdout. The API key comes
+from --apikey or $HARMONIC_API_KEY. harmonic.api and its dependencies are only
+imported once a subcommand runs, so --help does not pay for them.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from itertools import islice
+
+HARMONIC_CLI_ENRICH_CHUNK_SIZE = 10000  # inputs deduplicated and checkpointed together
+INPUT_FORMATS = ("csv", "jsonl", "lines")
+OUTPUT_FORMATS = ("jsonl", "csv")
+
+logger = logging.getLogger(__name__)
+
+
+def read_inputs(path, column=None, input_format=None):
+    """yields one value per row of a csv, jsonl or one value per line file
+
+    column: csv column or jsonl field, defaults to the first csv column and to
+    "url" for jsonl objects. The format comes from the file extension unless
+    input_format is given, stdin ("-") is read as lines by default.
+    """
+    input_format = input_format or _format_of(path, INPUT_FORMATS, "lines")
+    f = sys.stdin if path == "-" else open(path, newline="")
+    try:
+        if input_format == "csv":
+            reader = csv.DictReader(f)
+            column = column or (reader.fieldnames or [None])[0]
+            for row in reader:
+                value = (row.get(column) or "").strip()
+                if value:
+                    yield value
+        elif input_format == "jsonl":
+            for line in f:
+                if not line.strip():
+                    continue
+                value = json.loads(line)
+                if isinstance(value, dict):
+                    value = value.get(column or "url")
+                if value:
+                    yield value
+        else:
+            for line in f:
+                value = line.strip()
+                if value:
+                    yield value
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _format_of(path, formats, default):
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    extension = {"ndjson": "jsonl", "txt": "lines"}.get(extension, extension)
+    return extension if extension in formats else default
+
+
+def _client(args):
+    from harmonic.api import HarmonicClient
+
+    if not args.apikey:
+        raise SystemExit("harmonic: an API key is required, pass --apikey or set HARMONIC_API_KEY")
+    client = HarmonicClient(
+        args.apikey,
+        pool_maxsize=max(args.concurrency or 0, 32),
+        rate_limit=args.rate,
+        max_retries=args.max_retries,
+    )
+    if args.endpoint:
+        client._set_api_endpoint(args.endpoint)
+    return client
+
+
+def _max_workers(args):
+    from harmonic.api import HARMONIC_CONSUMER_API_MAX_WORKERS
+
+    return args.concurrency or HARMONIC_CONSUMER_API_MAX_WORKERS
+
+
+# enrich
+def enrich(args):
+    from harmonic.batch import COMPANY_BATCH_FIELDS, PERSON_BATCH_FIELDS, get_path
+
+    output_format = args.output_format or _format_of(args.output, OUTPUT_FORMATS, "jsonl")
+    if args.fields:
+        fields = args.fields
+    else:
+        fields = list(COMPANY_BATCH_FIELDS if args.type == "company" else PERSON_BATCH_FIELDS)
+    checkpoint_path = f"{args.output}.checkpoint.json"
+    checkpoint = None
+    if args.resume:
+        if args.output == "-":
+            raise SystemExit("harmonic: --resume needs an --output file")
+        checkpoint = _read_checkpoint(checkpoint_path)
+        if checkpoint is not None and (
+            checkpoint["input"] != os.path.abspath(args.input)
+            or checkpoint["type"] != args.type
+            or checkpoint["format"] != output_format
+        ):
+            raise SystemExit(
+                f"harmonic: {checkpoint_path} belongs to another enrichment, remove it or drop --resume"
+            )
+    if checkpoint is None:
+        checkpoint = {
+            "input": os.path.abspath(args.input),
+            "type": args.type,
+            "format": output_format,
+            "records": 0,
+            "errors": 0,
+            "bytes": 0,
+            "complete": False,
+        }
+    if checkpoint["complete"]:
+        logger.info("COMPLETE: %s already has %s results", args.output, checkpoint["records"])
+        return 0
+
+    client = _client(args)
+    max_workers = _max_workers(args)
+    if args.type == "company":
+        from harmonic.api import COMPANY_CANONICAL_URL_TYPE
+
+        default_type = COMPANY_CANONICAL_URL_TYPE(args.default_type) if args.default_type else None
+
+        def enrich_chunk(urls):
+            return client.enrich_companies(urls, max_workers=max_workers, default_type=default_type)
+
+    else:
+
+        def enrich_chunk(urls):
+            return client.enrich_persons(urls, max_workers=max_workers)
+
+    out = _open_output(args.output, checkpoint["bytes"])
+    try:
+        if output_format == "csv":
+            writer = csv.writer(out)
+            if checkpoint["bytes"] == 0:
+                writer.writerow(["input", "status", "error", *fields])
+
+            def write(result):
+                record = result.result or {}
+                writer.writerow(
+                    [
+                        result.input,
+                        result.status.value,
+                        "" if result.error is None else str(result.error),
+                        *(_csv_value(get_path(record, field)) for field in fields),
+                    ]
+                )
+
+        else:
+
+            def write(result):
+                row = {"input": result.input, "status": result.status.value}
+                if result.ok:
+                    row["result"] = result.result
+                else:
+                    row["error"] = str(result.error)
+                out.write(json.dumps(row))
+                out.write("\n")
+
+        inputs = islice(
+            read_inputs(args.input, args.column, args.input_format), checkpoint["records"], None
+        )
+        # each chunk is enriched as one deduplicated batch, so memory is bounded
+        # by the chunk and a resumed run repeats at most one chunk
+        while True:
+            chunk = list(islice(inputs, args.chunk_size))
+            if not chunk:
+                break
+            for result in enrich_chunk(chunk):
+                write(result)
+                checkpoint["records"] += 1
+                checkpoint["errors"] += not result.ok
+            if out is not sys.stdout:
+                checkpoint["bytes"] = _sync(out)
+                _save_checkpoint(checkpoint_path, checkpoint)
+            logger.info(
+                "enriched %s inputs, %s errors", checkpoint["records"], checkpoint["errors"]
+            )
+        checkpoint["complete"] = True
+        if out is not sys.stdout:
+            checkpoint["bytes"] = _sync(out)
+            _save_checkpoint(checkpoint_path, checkpoint)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        client.close()
+    logger.info(
+        "COMPLETE: enriched %s inputs, %s errors", checkpoint["records"], checkpoint["errors"]
+    )
+    return 0
+
+
+def _open_output(path, size):
+    if path == "-":
+        return sys.stdout
+    out = open(path, "r+" if os.path.exists(path) else "w+", newline="", encoding="utf-8")
+    if out.seek(0, os.SEEK_END) < size:
+        out.close()
+        raise SystemExit(f"harmonic: {path} is shorter than its checkpoint, start over without --resume")
+    # drop what was written after the last checkpoint
+    out.truncate(size)
+    out.seek(size)
+    return out
+
+
+def _sync(out):
+    out.flush()
+    os.fsync(out.fileno())
+    return out.tell()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _read_checkpoint(checkpoint_path):
+    try:
+        with open(checkpoint_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_checkpoint(checkpoint_path, checkpoint):
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+# export-search
+def export_search(args):
+    from harmonic.export import export_saved_search_results
+
+    client = _client(args)
+    try:
+        checkpoint = export_saved_search_results(
+            client,
+            args.saved_search_id,
+            args.output,
+            compression=args.compression,
+            resume=args.resume,
+            page_size=args.page_size,
+            prefetch=args.concurrency if args.concurrency is not None else 1,
+        )
+    finally:
+        client.close()
+    return 0 if checkpoint["complete"] else 1
+
+
+# watchlist-sync
+def watchlist_sync(args):
+    from harmonic.api import watchlist_diff
+
+    desired_urns = list(dict.fromkeys(read_inputs(args.input, args.column, args.input_format)))
+    client = _client(args)
+    try:
+        if args.dry_run:
+            watchlist = client.get_watchlist_by_id(args.watchlist_id)
+            to_add, to_remove = watchlist_diff(watchlist, desired_urns)
+            changes = {"added": to_add, "removed": to_remove}
+        else:
+            changes = client.sync_watchlist(
+                args.watchlist_id, desired_urns, max_workers=_max_workers(args)
+            )
+    finally:
+        client.close()
+    summary = {
+        "watchlist_id": args.watchlist_id,
+        "dry_run": args.dry_run,
+        "added": len(changes["added"]),
+        "removed": len(changes["removed"]),
+    }
+    if args.verbose:
+        summary.update(added_urns=changes["added"], removed_urns=changes["removed"])
+    print(json.dumps(summary))
+    return 0
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--apikey", default=os.environ.get("HARMONIC_API_KEY"), help="defaults to $HARMONIC_API_KEY"
+    )
+    common.add_argument(
+        "--endpoint", default=os.environ.get("HARMONIC_API_ENDPOINT"), help=argparse.SUPPRESS
+    )
+    common.add_argument(
+        "--concurrency", type=int, default=None, help="requests in flight at once (default 8)"
+    )
+    common.add_argument("--rate", type=float, default=None, help="max requests per second")
+    common.add_argument("--max-retries", type=int, default=5)
+    common.add_argument("-v", "--verbose", action="store_true")
+
+    inputs = argparse.ArgumentParser(add_help=False)
+    inputs.add_argument("--input", required=True, help='csv, jsonl or one value per line, "-" for stdin')
+    inputs.add_argument("--input-format", choices=INPUT_FORMATS, default=None)
+    inputs.add_argument("--column", default=None, help="csv column / jsonl field of the values")
+
+    parser = argparse.ArgumentParser(
+        prog="harmonic", description="Harmonic Consumer API jobs"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enrich_parser = subparsers.add_parser(
+        "enrich", parents=[common, inputs], help="enrich company or person urls"
+    )
+    enrich_parser.add_argument("--output", default="-", help='jsonl or csv, "-" for stdout')
+    enrich_parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default=None)
+    enrich_parser.add_argument("--type", choices=("company", "person"), default="company")
+    enrich_parser.add_argument(
+        "--default-type",
+        default=None,
+        help="company url type of the urls that are not profile sites, e.g. website_url",
+    )
+    enrich_parser.add_argument(
+        "--fields", nargs="+", default=None, help="dotted paths of the csv columns"
+    )
+    enrich_parser.add_argument(
+        "--chunk-size", type=int, default=HARMONIC_CLI_ENRICH_CHUNK_SIZE
+    )
+    enrich_parser.add_argument(
+        "--resume", action="store_true", help="continue from the checkpoint of --output"
+    )
+    enrich_parser.set_defaults(run=enrich)
+
+    export_parser = subparsers.add_parser(
+        "export-search", parents=[common], help="export the results of a saved search to jsonl"
+    )
+    export_parser.add_argument("saved_search_id")
+    export_parser.add_argument("--output", required=True)
+    export_parser.add_argument("--compression", choices=("gzip", "zstd"), default=None)
+    export_parser.add_argument("--page-size", type=int, default=100)
+    export_parser.add_argument(
+        "--resume", action="store_true", help="continue from the checkpoint of --output"
+    )
+    export_parser.set_defaults(run=export_search)
+
+    sync_parser = subparsers.add_parser(
+        "watchlist-sync",
+        parents=[common, inputs],
+        help="make a watchlist hold exactly the company urns of --input",
+    )
+    sync_parser.add_argument("watchlist_id")
+    sync_parser.add_argument(
+        "--dry-run", action="store_true", help="print the changes without applying them"
+    )
+    sync_parser.set_defaults(run=watchlist_sync)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(name)s %(levelname)s %(message)s",
+        stream=sys.stderr,
+    )
+    from harmonic.api import HarmonicAPIError
+
+    try:
+        return args.run(args)
+    except (HarmonicAPIError, OSError, ValueError) as e:
+        print(f"harmonic {args.command}: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
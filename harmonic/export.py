@@ -0,0 +1,231 @@
+import gzip
+import io
+import json
+import logging
+import os
+import queue
+import threading
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+HARMONIC_EXPORT_QUEUE_PAGES = 16  # pages buffered between the fetch and the disk
+HARMONIC_EXPORT_WRITE_BUFFER = 1024 * 1024  # 1MB
+COMPRESSIONS = (None, "gzip", "zstd")
+
+logger = logging.getLogger(__name__)
+
+
+def export_saved_search_results(
+    client,
+    saved_search_id,
+    path,
+    compression=None,
+    checkpoint_path=None,
+    resume=True,
+    page_size=100,
+    prefetch=0,
+    checkpoint_every=1,
+):
+    """streams every result of a saved search to a JSONL file, one record per line
+
+    compression: None, "gzip" or "zstd" (`pip install zstandard`)
+    checkpoint_path: defaults to path + ".checkpoint.json"
+    resume: continue from the checkpoint of a previous run instead of starting over
+    checkpoint_every: pages written between two checkpoints
+
+    The checkpoint records the last completed page and the file size at that
+    point. A resumed run truncates whatever was written after it and refetches
+    from the next page, so no record is duplicated or missing. Pages are
+    written by a background thread so disk I/O does not hold up the fetch.
+    Returns the checkpoint, {"complete": True, "records": ..., ...} when done.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"compression has to be one of {COMPRESSIONS}")
+    if compression == "zstd" and zstandard is None:
+        raise ImportError("zstd compression requires `pip install zstandard`")
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint.json"
+
+    checkpoint = _read_checkpoint(checkpoint_path) if resume else None
+    if checkpoint is not None and (
+        checkpoint["saved_search_id"] != saved_search_id
+        or checkpoint["page_size"] != page_size
+        or checkpoint["compression"] != compression
+    ):
+        raise ValueError(
+            f"{checkpoint_path} belongs to another export, remove it or pass resume=False"
+        )
+    if checkpoint is None:
+        checkpoint = {
+            "saved_search_id": saved_search_id,
+            "page_size": page_size,
+            "compression": compression,
+            "next_page": 0,
+            "records": 0,
+            "bytes": 0,
+            "complete": False,
+        }
+    if checkpoint["complete"]:
+        logger.info("COMPLETE: %s already has %s results", path, checkpoint["records"])
+        return checkpoint
+
+    writer = _PageWriter(path, compression, checkpoint, checkpoint_path, checkpoint_every)
+    page_records = []
+
+    def on_page(page, page_result_count):
+        writer.put(page, page_records[:])
+        page_records.clear()
+
+    try:
+        for record in client.iter_saved_search_results(
+            saved_search_id,
+            page_size=page_size,
+            prefetch=prefetch,
+            on_page=on_page,
+            start_page=checkpoint["next_page"],
+        ):
+            page_records.append(record)
+    except BaseException:
+        # keep every completed page, the partial one is refetched on resume
+        writer.finish(complete=False)
+        raise
+    checkpoint = writer.finish(complete=True)
+    logger.info(
+        "COMPLETE: search %s exported %s results to %s",
+        saved_search_id,
+        checkpoint["records"],
+        path,
+    )
+    return checkpoint
+
+
+class _PageWriter:
+    def __init__(self, path, compression, checkpoint, checkpoint_path, checkpoint_every):
+        self.path = path
+        self.compression = compression
+        self.checkpoint = dict(checkpoint)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.error = None
+        self._queue = queue.Queue(maxsize=HARMONIC_EXPORT_QUEUE_PAGES)
+
+        mode = "r+b" if os.path.exists(path) else "w+b"
+        self._raw = open(path, mode)
+        if self._raw.seek(0, io.SEEK_END) < self.checkpoint["bytes"]:
+            self._raw.close()
+            raise ValueError(f"{path} is shorter than its checkpoint, start over with resume=False")
+        # drop what was written after the last checkpoint
+        self._raw.truncate(self.checkpoint["bytes"])
+        self._raw.seek(self.checkpoint["bytes"])
+        self._out = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, page, records):
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                self._queue.put((page, records), timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self, complete):
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            self._raw.close()
+            raise self.error
+        self._end_frame()
+        if complete:
+            self.checkpoint["complete"] = True
+        self._save_checkpoint()
+        self._raw.close()
+        return self.checkpoint
+
+    def _run(self):
+        pages_since_checkpoint = 0
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                page, records = item
+                out = self._open_frame()
+                for record in records:
+                    out.write(json.dumps(record).encode())
+                    out.write(b"\n")
+                self.checkpoint["next_page"] = page + 1
+                self.checkpoint["records"] += len(records)
+                pages_since_checkpoint += 1
+                if pages_since_checkpoint >= self.checkpoint_every:
+                    self._end_frame()
+                    self._save_checkpoint()
+                    pages_since_checkpoint = 0
+        except BaseException as e:
+            self.error = e
+            # unblock the producer
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _open_frame(self):
+        # every checkpoint closes the gzip member / zstd frame, so truncating
+        # the file at a checkpoint always leaves a valid compressed stream
+        if self._out is None:
+            buffered = io.BufferedWriter(_Unclosable(self._raw), HARMONIC_EXPORT_WRITE_BUFFER)
+            if self.compression == "gzip":
+                self._out = gzip.GzipFile(fileobj=buffered, mode="wb")
+            elif self.compression == "zstd":
+                self._out = zstandard.ZstdCompressor().stream_writer(
+                    buffered, closefd=False
+                )
+            else:
+                self._out = buffered
+            self._buffered = buffered
+        return self._out
+
+    def _end_frame(self):
+        if self._out is None:
+            return
+        if self._out is not self._buffered:
+            self._out.close()
+        self._buffered.flush()
+        self._out = None
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self.checkpoint["bytes"] = self._raw.tell()
+
+    def _save_checkpoint(self):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+class _Unclosable(io.RawIOBase):
+    """lets a BufferedWriter sit on the export file without closing it"""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        return self._raw.write(b)
+
+
+def _read_checkpoint(checkpoint_path):
+    try:
+        with open(checkpoint_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
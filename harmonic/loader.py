@@ -0,0 +1,230 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from harmonic.api import HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST
+
+HARMONIC_LOADER_WINDOW = 0.005  # seconds a load waits for others to join its batch
+HARMONIC_LOADER_MAX_BATCHES = 4  # bulk calls in flight at once
+
+
+class BatchLoader:
+    """coalesces single id loads from many threads into bulk calls
+
+    loader = company_loader(client)
+    company = loader.load(company_id)  # from any number of threads
+
+    Loads arriving within `window` seconds of the first one, up to
+    max_batch_size ids, are sent as one batch_fn(ids) call, which returns one
+    entry per id in order (None when not found). A load for an id already
+    waiting or in flight shares its future instead of adding a request.
+    """
+
+    def __init__(
+        self,
+        batch_fn,
+        window=HARMONIC_LOADER_WINDOW,
+        max_batch_size=HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST,
+        max_batches=HARMONIC_LOADER_MAX_BATCHES,
+    ):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending = {}  # id -> future, not sent yet
+        self._futures = {}  # id -> future, pending or in flight
+        self._first_at = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_batches)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def load_future(self, id):
+        """concurrent.futures.Future of the record of id"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("the loader is closed")
+            future = self._futures.get(id)
+            if future is None:
+                future = self._futures[id] = Future()
+                self._pending[id] = future
+                if self._first_at is None:
+                    self._first_at = time.monotonic()
+                    self._condition.notify()
+                elif len(self._pending) >= self.max_batch_size:
+                    self._condition.notify()
+            return future
+
+    def load(self, id, timeout=None):
+        """record of id, None when it is not found"""
+        return self.load_future(id).result(timeout)
+
+    def load_many(self, ids, timeout=None):
+        futures = [self.load_future(id) for id in ids]
+        return [future.result(timeout) for future in futures]
+
+    def close(self):
+        """sends the loads still waiting and stops the loader"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                # wait for the window to close or the batch to fill up
+                while not self._closed and len(self._pending) < self.max_batch_size:
+                    remaining = self._first_at + self.window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                ids = list(self._pending)[: self.max_batch_size]
+                batch = [(id, self._pending.pop(id)) for id in ids]
+                self._first_at = time.monotonic() if self._pending else None
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        try:
+            records = self.batch_fn([id for id, _ in batch])
+            if len(records) != len(batch):
+                raise ValueError(
+                    f"batch_fn returned {len(records)} records for {len(batch)} ids"
+                )
+        except Exception as e:
+            results = None
+            error = e
+        else:
+            results = records
+        with self._condition:
+            for id, _ in batch:
+                self._futures.pop(id, None)
+        for i, (_, future) in enumerate(batch):
+            if results is None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[i])
+
+
+class AsyncBatchLoader:
+    """asyncio twin of BatchLoader, batch_fn is a coroutine function
+
+    loader = company_loader(async_client)
+    company = await loader.load(company_id)
+    """
+
+    def __init__(
+        self,
+        batch_fn,
+        window=HARMONIC_LOADER_WINDOW,
+        max_batch_size=HARMONIC_CONSUMER_API_MAX_IDS_PER_REQUEST,
+    ):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending = {}
+        self._futures = {}
+        self._timer = None
+        self._tasks = set()
+
+    def load_future(self, id):
+        future = self._futures.get(id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[id] = loop.create_future()
+            self._pending[id] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._dispatch)
+        return future
+
+    async def load(self, id):
+        """record of id, None when it is not found"""
+        return await self.load_future(id)
+
+    async def load_many(self, ids):
+        return list(await asyncio.gather(*[self.load_future(id) for id in ids]))
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = list(self._pending.items())
+        self._pending = {}
+        for i in range(0, len(batch), self.max_batch_size):
+            task = asyncio.ensure_future(self._load_batch(batch[i : i + self.max_batch_size]))
+            # keep a reference until it is done
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, batch):
+        try:
+            records = await self.batch_fn([id for id, _ in batch])
+            if len(records) != len(batch):
+                raise ValueError(
+                    f"batch_fn returned {len(records)} records for {len(batch)} ids"
+                )
+        except Exception as e:
+            for id, future in batch:
+                self._futures.pop(id, None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (id, future), record in zip(batch, records):
+            self._futures.pop(id, None)
+            if not future.done():
+                future.set_result(record)
+
+
+def company_loader(client, **kwargs):
+    """loader of companies by id or URN over client.get_companies_by_ids"""
+    return _entity_loader(client.get_companies_by_ids, **kwargs)
+
+
+def person_loader(client, **kwargs):
+    """loader of persons by id or URN over client.get_persons_by_ids"""
+    return _entity_loader(client.get_persons_by_ids, **kwargs)
+
+
+def _entity_loader(get_by_ids, **kwargs):
+    # a batch can mix ids and URNs, each kind is one bulk call
+    if asyncio.iscoroutinefunction(get_by_ids):
+
+        async def batch_fn(ids):
+            urns, numeric_ids = _split_urns(ids)
+            found = {}
+            for keys, isURN in ((urns, True), (numeric_ids, False)):
+                if keys:
+                    found.update(zip(keys, await get_by_ids(keys, isURN=isURN)))
+            return [found.get(id) for id in ids]
+
+        return AsyncBatchLoader(batch_fn, **kwargs)
+
+    def batch_fn(ids):
+        urns, numeric_ids = _split_urns(ids)
+        found = {}
+        for keys, isURN in ((urns, True), (numeric_ids, False)):
+            if keys:
+                found.update(zip(keys, get_by_ids(keys, isURN=isURN)))
+        return [found.get(id) for id in ids]
+
+    return BatchLoader(batch_fn, **kwargs)
+
+
+def _split_urns(ids):
+    urns = [id for id in ids if str(id).startswith("urn:")]
+    numeric_ids = [id for id in ids if not str(id).startswith("urn:")]
+    return urns, numeric_ids
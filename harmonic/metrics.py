@@ -0,0 +1,226 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - optional dependency
+    otel_trace = None
+
+HARMONIC_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# numeric ids, urns and uuids in a path become {id} so each endpoint is one series
+_ID_SEGMENT = re.compile(r"/(urn:[^/:]+:[^/:]+:[^/]+?|[0-9a-fA-F-]{36}|\d+)(?=$|/|:)")
+
+
+def endpoint_name(url, api_endpoint=""):
+    """templated path of a request url, e.g. /companies/{id}"""
+    if api_endpoint and url.startswith(api_endpoint):
+        url = url[len(api_endpoint) :]
+    path = url.split("?", 1)[0]
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+class Histogram:
+    def __init__(self, buckets=HARMONIC_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """upper bound of the bucket holding the q quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class HarmonicMetrics:
+    """per endpoint latency, status codes, retries, bytes and records of a client
+
+    client = HarmonicClient(API_KEY, metrics=HarmonicMetrics())
+    client.metrics.add_callback(lambda event: statsd.timing(...))
+    print(client.metrics.to_prometheus())
+
+    Every request and saved search page is recorded, callbacks receive one
+    event dict per request ("request") and per retry ("retry"). Spans are
+    emitted through OpenTelemetry when it is installed, pass tracer= to
+    use a specific tracer.
+    """
+
+    def __init__(self, buckets=HARMONIC_LATENCY_BUCKETS, tracer=None):
+        self.buckets = buckets
+        self.latency = defaultdict(lambda: Histogram(self.buckets))
+        self.status_codes = defaultdict(int)  # (endpoint, status) -> count
+        self.retries = defaultdict(int)
+        self.request_bytes = defaultdict(int)
+        self.response_bytes = defaultdict(int)
+        self.records = defaultdict(int)
+        self._records_window = {}  # endpoint -> (first seen, last seen)
+        self._callbacks = []
+        self._lock = threading.Lock()
+        if tracer is None and otel_trace is not None:
+            tracer = otel_trace.get_tracer("harmonic")
+        self.tracer = tracer
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    def observe(
+        self,
+        endpoint,
+        method,
+        status,
+        latency,
+        request_bytes=0,
+        response_bytes=0,
+        records=None,
+    ):
+        """one request attempt, status is the HTTP status or "error" without a response"""
+        now = time.time()
+        with self._lock:
+            self.latency[endpoint].observe(latency)
+            self.status_codes[(endpoint, str(status))] += 1
+            self.request_bytes[endpoint] += request_bytes
+            self.response_bytes[endpoint] += response_bytes
+            if records:
+                self.records[endpoint] += records
+                first, _ = self._records_window.get(endpoint, (now - latency, now))
+                self._records_window[endpoint] = (first, now)
+        self._emit(
+            {
+                "type": "request",
+                "endpoint": endpoint,
+                "method": method,
+                "status": status,
+                "latency": latency,
+                "request_bytes": request_bytes,
+                "response_bytes": response_bytes,
+                "records": records,
+            }
+        )
+
+    def observe_retry(self, endpoint, error):
+        with self._lock:
+            self.retries[endpoint] += 1
+        self._emit({"type": "retry", "endpoint": endpoint, "error": error})
+
+    def records_per_second(self, endpoint):
+        with self._lock:
+            window = self._records_window.get(endpoint)
+            if window is None:
+                return 0.0
+            elapsed = window[1] - window[0]
+            return self.records[endpoint] / elapsed if elapsed > 0 else 0.0
+
+    def _emit(self, event):
+        for callback in list(self._callbacks):
+            callback(event)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """OpenTelemetry span when a tracer is available, otherwise a no-op"""
+        if self.tracer is None:
+            yield _NoopSpan()
+            return
+        with self.tracer.start_as_current_span(name) as span:
+            for key, value in attributes.items():
+                span.set_attribute(key, value)
+            yield span
+
+    def to_prometheus(self, prefix="harmonic"):
+        """all the metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            name = f"{prefix}_request_duration_seconds"
+            lines += [
+                f"# HELP {name} Latency of Harmonic API requests.",
+                f"# TYPE {name} histogram",
+            ]
+            for endpoint, histogram in sorted(self.latency.items()):
+                label = f'endpoint="{_escape(endpoint)}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{label}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{label}}} {histogram.count}")
+
+            name = f"{prefix}_requests_total"
+            lines += [
+                f"# HELP {name} Harmonic API requests by status code.",
+                f"# TYPE {name} counter",
+            ]
+            for (endpoint, status), count in sorted(self.status_codes.items()):
+                lines.append(
+                    f'{name}{{endpoint="{_escape(endpoint)}",status="{status}"}} {count}'
+                )
+
+            for metric, help_text, values in (
+                ("retries_total", "Retried Harmonic API requests.", self.retries),
+                ("request_bytes_total", "Bytes sent to the Harmonic API.", self.request_bytes),
+                ("response_bytes_total", "Bytes received from the Harmonic API.", self.response_bytes),
+                ("records_total", "Records received from the Harmonic API.", self.records),
+            ):
+                name = f"{prefix}_{metric}"
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for endpoint, value in sorted(values.items()):
+                    lines.append(f'{name}{{endpoint="{_escape(endpoint)}"}} {value}')
+            record_endpoints = sorted(self.records)
+
+        name = f"{prefix}_records_per_second"
+        lines += [
+            f"# HELP {name} Records received per second while streaming.",
+            f"# TYPE {name} gauge",
+        ]
+        for endpoint in record_endpoints:
+            lines.append(
+                f'{name}{{endpoint="{_escape(endpoint)}"}} {self.records_per_second(endpoint)}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+class ByteCounter:
+    """passes chunks through while counting their bytes"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.bytes = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.bytes += len(chunk)
+            yield chunk
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+
+def request_size(prepared_request):
+    """approximate bytes sent for a requests.PreparedRequest"""
+    body = prepared_request.body or b""
+    return len(prepared_request.url) + len(body)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
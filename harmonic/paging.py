@@ -0,0 +1,107 @@
+import threading
+
+HARMONIC_PAGE_SIZE_MIN = 25
+HARMONIC_PAGE_SIZE_MAX = 1000
+HARMONIC_PAGE_TARGET_LATENCY = 2.0  # seconds per page
+HARMONIC_MAX_BUFFERED_BYTES = 64 * 1024 * 1024  # 64MB across the pages in flight
+HARMONIC_PAGE_ERROR_RATE = 0.05  # no growth above this share of failed pages
+_SMOOTHING = 0.3  # weight of the newest observation in the moving averages
+
+
+class AdaptivePageSize:
+    """saved search page size tuned from latency, response bytes and errors
+
+    for company in client.iter_saved_search_results(id, adaptive=AdaptivePageSize()):
+        ...
+
+    The size doubles while pages come back well under target_latency and
+    halves when they are slower, fail, or would not fit in
+    max_buffered_bytes. Sizes are min_size * 2**k so that the position
+    reached is always a whole number of pages of the next size.
+    """
+
+    def __init__(
+        self,
+        min_size=HARMONIC_PAGE_SIZE_MIN,
+        max_size=HARMONIC_PAGE_SIZE_MAX,
+        initial_size=None,
+        target_latency=HARMONIC_PAGE_TARGET_LATENCY,
+        max_buffered_bytes=HARMONIC_MAX_BUFFERED_BYTES,
+    ):
+        if not 0 < min_size <= max_size:
+            raise ValueError("page sizes have to satisfy 0 < min_size <= max_size")
+        self.min_size = min_size
+        self.max_size = min_size
+        while self.max_size * 2 <= max_size:
+            self.max_size *= 2
+        self.target_latency = target_latency
+        self.max_buffered_bytes = max_buffered_bytes
+        self.size = self._round(initial_size or min_size * 4)
+        self.latency_per_record = None
+        self.bytes_per_record = None
+        self.error_rate = 0.0
+        self._lock = threading.Lock()
+
+    def next_size(self, offset, buffered_pages=1):
+        """size of the page starting at offset, when buffered_pages pages are held at once"""
+        with self._lock:
+            size = self.size
+            if self.bytes_per_record:
+                while (
+                    size > self.min_size
+                    and size * self.bytes_per_record * buffered_pages
+                    > self.max_buffered_bytes
+                ):
+                    size //= 2
+            while size > self.min_size and offset % size:
+                size //= 2
+            return size
+
+    def max_page_bytes(self, buffered_pages=1):
+        return self.max_buffered_bytes // max(1, buffered_pages)
+
+    def observe(self, size, records, latency, response_bytes):
+        """a page of size came back with records in latency seconds"""
+        with self._lock:
+            self.error_rate *= 1 - _SMOOTHING
+            if not records:
+                return
+            self.latency_per_record = _average(self.latency_per_record, latency / records)
+            self.bytes_per_record = _average(self.bytes_per_record, response_bytes / records)
+            if latency > self.target_latency:
+                self.size = self._round(size // 2)
+            elif (
+                latency < self.target_latency / 2
+                and size >= self.size
+                and self.error_rate < HARMONIC_PAGE_ERROR_RATE
+            ):
+                self.size = self._round(size * 2)
+
+    def observe_error(self, size):
+        """a page of size failed or was too large"""
+        with self._lock:
+            self.error_rate = _average(self.error_rate, 1.0)
+            self.size = self._round(min(self.size, size // 2))
+
+    def limit(self, size):
+        """the server answers at most size records per page, max_size is kept below it"""
+        with self._lock:
+            limit = self.min_size
+            while limit * 2 <= min(size, self.max_size):
+                limit *= 2
+            self.max_size = limit
+            self.size = min(self.size, limit)
+
+    def _round(self, size):
+        rounded = self.min_size
+        while rounded * 2 <= min(size, self.max_size):
+            rounded *= 2
+        return rounded
+
+
+class PageTooLarge(Exception):
+    """a page response grew past the byte budget of its page"""
+
+
+def _average(current, value):
+    return value if current is None else current + _SMOOTHING * (value - current)
@@ -0,0 +1,104 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+HARMONIC_CONSUMER_API_BACKOFF_BASE = 0.5  # seconds
+HARMONIC_CONSUMER_API_BACKOFF_CAP = 30  # seconds
+
+
+class RateLimiter:
+    """token bucket shared by every thread and coroutine of a client
+
+    rate: requests per second, None to only honour the server's 429 / Retry-After
+    burst: requests allowed back to back after an idle period
+    A 429 pauses every caller until Retry-After and lowers the rate, which then
+    climbs back quickly up to the rate that got throttled and slowly past it,
+    so throughput settles just under the quota.
+    """
+
+    def __init__(self, rate=None, burst=None, min_rate=0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or (max(1, int(rate)) if rate else 1)
+        self.min_rate = min(min_rate, rate) if rate else min_rate
+        self._ceiling = rate
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """takes one token, returns how long the caller has to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            pause = max(0.0, self._paused_until - now)
+            if self.rate is None:
+                return pause
+            self._tokens = min(
+                self.burst, self._tokens + max(0.0, now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, pause)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        if self.rate is None or self.rate >= self.max_rate:
+            return
+        with self._lock:
+            step = self.max_rate / 100
+            if self.rate >= self._ceiling:
+                step /= 10  # probe slowly past the rate that got throttled
+            self.rate = min(self.max_rate, self.rate + step)
+
+    def on_rate_limited(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            # the requests already in flight get their 429 together, count them once
+            if self.rate is not None and now - self._last_decrease >= 1:
+                self._last_decrease = now
+                self._ceiling = self.rate
+                self.rate = max(self.min_rate, self.rate * 0.7)
+                # no burst right after the pause
+                self._tokens = 0.0
+                self._updated = max(now, self._paused_until)
+
+
+def retry_delay(attempt):
+    """seconds before retry number attempt (from 1), exponential backoff with full jitter"""
+    return random.uniform(
+        0,
+        min(
+            HARMONIC_CONSUMER_API_BACKOFF_CAP,
+            HARMONIC_CONSUMER_API_BACKOFF_BASE * 2 ** (attempt - 1),
+        ),
+    )
+
+
+def parse_retry_after(value):
+    """seconds to wait from a Retry-After header, either delay-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
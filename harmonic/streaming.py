@@ -0,0 +1,164 @@
+import json
+import re
+
+# outside of strings only these bytes change the scanner state
+_STRUCTURE = re.compile(rb'[\[\]{}",]')
+_STRING_END = re.compile(rb'["\\]')
+# inside the array, everything up to the next bracket (or comma between
+# elements) in one match, complete strings included; an unterminated string
+# stops the match at its quote
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_SKIP_ELEMENT = re.compile(rb'(?:[^"\[\]{}]+|' + _STRING + rb")*")
+_SKIP_ARRAY = re.compile(rb'(?:[^"\[\]{},]+|' + _STRING + rb")*")
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+_OPEN = b"[{"
+_CLOSE = b"]}"
+_COMMA = ord(",")
+
+
+class JSONArrayScanner:
+    """incrementally splits a JSON array out of a byte stream
+
+    With key="results" the array is the "results" member of the top level
+    object, with key=None the top level value is the array itself.
+    feed() returns the raw bytes of every element completed by the chunk,
+    only the bytes of the element being received are kept in memory.
+    """
+
+    def __init__(self, key="results"):
+        self.key = key.encode() if key is not None else None
+        self.array_depth = 2 if key is not None else 1
+        self.found = False
+        self.done = False
+        self._buf = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_array = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key = None
+        self._element_start = 0
+
+    def feed(self, chunk):
+        if self.done:
+            return []
+        buf = self._buf
+        buf += chunk
+        items = []
+        pos = self._pos
+        depth = self._depth
+        end = len(buf)
+        array_depth = self.array_depth
+        skip_element = _SKIP_ELEMENT.match
+        while pos < end:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                m = _STRING_END.search(buf, pos)
+                if m is None:
+                    pos = end
+                    break
+                pos = m.end()
+                if buf[m.start()] == _BACKSLASH:
+                    self._escape = True
+                    continue
+                self._in_string = False
+                if depth == 1 and not self._in_array:
+                    self._last_key = bytes(buf[self._string_start : m.start()])
+                continue
+
+            if self._in_array and depth > array_depth:
+                # hot loop, inside an element only brackets change the state
+                start = skip_element(buf, pos).end()
+                while start < end:
+                    c = buf[start]
+                    if c == _QUOTE:
+                        break
+                    pos = start + 1
+                    depth += 1 if c in _OPEN else -1
+                    if depth == array_depth:
+                        break
+                    start = skip_element(buf, pos).end()
+                else:
+                    pos = end
+                    break
+                if c == _QUOTE:  # a string not received in full yet
+                    pos = start + 1
+                    self._in_string = True
+                    self._string_start = pos
+                continue
+            if self._in_array:
+                start = _SKIP_ARRAY.match(buf, pos).end()
+                if start >= end:
+                    pos = end
+                    break
+                c = buf[start]
+                pos = start + 1
+            else:
+                m = _STRUCTURE.search(buf, pos)
+                if m is None:
+                    pos = end
+                    break
+                start = m.start()
+                c = buf[start]
+                pos = m.end()
+            if c == _QUOTE:
+                self._in_string = True
+                self._string_start = pos
+            elif c in _OPEN:
+                depth += 1
+                if (
+                    depth == array_depth
+                    and not self._in_array
+                    and (self.key is None or self._last_key == self.key)
+                    and c == _OPEN[0]
+                ):
+                    self.found = True
+                    self._in_array = True
+                    self._element_start = pos
+            elif c in _CLOSE:
+                if self._in_array and depth == array_depth:
+                    item = bytes(buf[self._element_start : start]).strip()
+                    if item:
+                        items.append(item)
+                    self._in_array = False
+                    self.done = True
+                    break
+                depth -= 1
+            elif c == _COMMA and self._in_array and depth == array_depth:
+                items.append(bytes(buf[self._element_start : start]).strip())
+                self._element_start = pos
+
+        # drop every byte that is not part of the current element or key
+        if self.done:
+            keep_from = end
+        elif self._in_array:
+            keep_from = self._element_start
+        elif self._in_string:
+            keep_from = self._string_start
+        else:
+            keep_from = pos
+        del buf[:keep_from]
+        self._pos = pos - keep_from
+        self._element_start -= keep_from
+        self._string_start -= keep_from
+        self._depth = depth
+        return items
+
+
+def iter_json_array(chunks, key="results", loads=json.loads):
+    """decoded elements of a JSON array, as soon as the bytes of each arrive"""
+    scanner = JSONArrayScanner(key)
+    # the tail after the array is still read so the connection can be reused
+    for chunk in chunks:
+        if chunk:  # filter out keep-alive new chunks
+            for item in scanner.feed(chunk):
+                yield loads(item)
+    if not scanner.found:
+        raise ValueError(f"no {key or 'top level'} array in the response")
+    if not scanner.done:
+        raise ValueError("response ended in the middle of the array")
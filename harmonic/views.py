@@ -0,0 +1,178 @@
+import json
+from collections.abc import Mapping
+from functools import lru_cache
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+if msgspec is not None:
+    # members of an object / items of an array as undecoded byte slices
+    _members = msgspec.json.Decoder(dict[str, msgspec.Raw]).decode
+    _items = msgspec.json.Decoder(list[msgspec.Raw]).decode
+    loads = msgspec.json.Decoder().decode
+    _Raw = msgspec.Raw
+else:
+    _members = _items = None
+    loads = orjson.loads if orjson is not None else json.loads
+    _Raw = ()
+
+_OBJECT = ord("{")
+_ARRAY = ord("[")
+
+
+class RecordView(Mapping):
+    """read-only company / person record decoded on access
+
+    view = RecordView(raw_bytes, fields=["name", "website.domain", "funding"])
+    view["website"]["domain"]
+
+    With msgspec installed a view only splits its top level members out of
+    the raw bytes, and a member is decoded the first time it is read: nested
+    objects are views themselves, arrays are decoded at once into tuples.
+    Without it the whole record is decoded on first access (with orjson when
+    installed). fields are dotted paths, the members outside of them behave
+    as missing.
+    to_dict() returns a plain dict, e.g. for json.dumps, replace() a view
+    with some members set.
+    """
+
+    __slots__ = ("_source", "_fields", "_members", "_values", "_extra")
+
+    def __init__(self, source, fields=None):
+        """source: bytes of a JSON object, or an already decoded dict"""
+        self._source = source
+        self._fields = fields if fields is None or isinstance(fields, dict) else projection(fields)
+        self._members = source if isinstance(source, dict) else None
+        self._values = {}
+        self._extra = None
+
+    def __getitem__(self, key):
+        values = self._values
+        if key in values:
+            return values[key]
+        if self._fields is not None and key not in self._fields:
+            raise KeyError(key)
+        value = _view(self._index()[key], self._fields and self._fields[key])
+        values[key] = value
+        return value
+
+    def __contains__(self, key):
+        return (
+            (self._fields is None or key in self._fields) and key in self._index()
+        ) or (self._extra is not None and key in self._extra)
+
+    def __iter__(self):
+        fields = self._fields
+        keys = self._index() if fields is None else [key for key in self._index() if key in fields]
+        if self._extra is not None:
+            keys = [key for key in keys if key not in self._extra] + list(self._extra)
+        return iter(keys)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def replace(self, **members):
+        """view of the same record with members set or added, the others still decoded on access"""
+        view = RecordView(self._source, self._fields)
+        view._members = self._members
+        view._values = {**self._values, **members}
+        view._extra = {**(self._extra or {}), **members}
+        return view
+
+    def to_dict(self):
+        if self._fields is None and self._extra is None and not isinstance(self._source, dict):
+            return loads(self._source)
+        return {key: _plain(self[key]) for key in self}
+
+    def __repr__(self):
+        return f"RecordView({self.to_dict()!r})"
+
+    def _index(self):
+        if self._members is None:
+            if _members is not None:
+                self._members = _members(self._source)
+            else:
+                self._members = loads(self._source)
+        return self._members
+
+
+@lru_cache(maxsize=256)
+def _projection(fields):
+    tree = {}
+    for field in fields:
+        key, _, rest = field.partition(".")
+        if not rest:
+            tree[key] = None
+        elif key not in tree or tree[key] is not None:
+            tree.setdefault(key, []).append(rest)
+    return {key: None if sub is None else projection(sub) for key, sub in tree.items()}
+
+
+def projection(fields):
+    """{top level field: projection of its members or None for all of them} of dotted paths"""
+    return _projection(tuple(fields))
+
+
+def record_views(data, fields=None, key=None):
+    """RecordView of every object of a JSON array, key: member of the top level object holding it"""
+    fields = None if fields is None else projection(fields)
+    if _members is not None:
+        items = _items(data) if key is None else getattr(_array_member(key).decode(data), key)
+        return [RecordView(item, fields) for item in items]
+    array = loads(data)
+    if key is not None:
+        array = array[key]
+    return [_view(item, fields) for item in array]
+
+
+@lru_cache(maxsize=16)
+def _array_member(key):
+    # splits the items of one member in a single pass, the other members are skipped
+    return msgspec.json.Decoder(
+        msgspec.defstruct("Response", [(key, list[msgspec.Raw])])
+    )
+
+
+def record_loader(lazy):
+    """bytes of one record -> record, a RecordView when lazy is True or a list of fields"""
+    if not lazy:
+        return json.loads
+    fields = None if lazy is True else projection(lazy)
+    return lambda raw: RecordView(raw, fields)
+
+
+def page_records(data, lazy, key="results"):
+    """records of a whole saved search page, see record_loader"""
+    if not lazy:
+        return json.loads(data)[key]
+    return record_views(data, None if lazy is True else lazy, key)
+
+
+def _view(value, fields):
+    if isinstance(value, _Raw):
+        first = memoryview(value)[0]
+        if first == _OBJECT:
+            return RecordView(value, fields)
+        if first == _ARRAY:
+            return tuple(_view(item, fields) for item in loads(value))
+        return loads(value)
+    if isinstance(value, dict):
+        return RecordView(value, fields)
+    if isinstance(value, list):
+        return tuple(_view(item, fields) for item in value)
+    return value
+
+
+def _plain(value):
+    if isinstance(value, RecordView):
+        return value.to_dict()
+    if isinstance(value, (tuple, list)):
+        return [_plain(item) for item in value]
+    return value
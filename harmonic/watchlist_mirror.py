@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import threading
+
+
+class WatchlistMirror:
+    """local copy of company watchlist memberships with O(1) lookups
+
+    mirror = WatchlistMirror(client, path="watchlists.json")
+    mirror.refresh()
+    mirror.contains(watchlist_id, company_urn)
+    mirror.watchlists_containing(company_urn)
+
+    The mirror attaches itself to the client, whose add/remove/set/sync
+    watchlist calls then update it in place. refresh() only downloads the
+    watchlists whose metadata changed since the last refresh, or that were
+    changed through company ids the mirror could not resolve to URNs.
+    """
+
+    def __init__(self, client, path=None):
+        self.client = client
+        self.path = path
+        self._watchlists = {}  # key -> {"meta", "fingerprint", "urns", "stale"}
+        self._aliases = {}  # id or urn -> key
+        self._index = {}  # company urn -> set of watchlist keys
+        self._lock = threading.RLock()
+        if path and os.path.exists(path):
+            self._load()
+        client.watchlist_mirror = self
+
+    # lookups
+    def contains(self, watchlist_id, urn):
+        with self._lock:
+            key = self._aliases.get(str(watchlist_id))
+            return key is not None and key in self._index.get(urn, ())
+
+    def watchlists_containing(self, urn):
+        """metadata of every mirrored watchlist holding the company"""
+        with self._lock:
+            return [self._watchlists[key]["meta"] for key in self._index.get(urn, ())]
+
+    def members(self, watchlist_id):
+        with self._lock:
+            key = self._aliases.get(str(watchlist_id))
+            return frozenset(self._watchlists[key]["urns"]) if key else frozenset()
+
+    def watchlists(self):
+        with self._lock:
+            return [watchlist["meta"] for watchlist in self._watchlists.values()]
+
+    # synchronisation
+    def refresh(self, force=False):
+        """re-download the watchlists that changed, returns their metadata"""
+        listing = self.client.get_watchlists()
+        refreshed = []
+        seen = set()
+        for meta in listing:
+            key = _watchlist_key(meta)
+            seen.add(key)
+            fingerprint = _fingerprint(meta)
+            with self._lock:
+                current = self._watchlists.get(key)
+                unchanged = (
+                    current is not None
+                    and not current["stale"]
+                    and current["fingerprint"] == fingerprint
+                )
+            if unchanged and not force:
+                continue
+            watchlist = self.client.get_watchlist_by_id(meta.get("id", key))
+            urns = [company["entity_urn"] for company in watchlist["companies"]]
+            with self._lock:
+                self._set_members(key, urns)
+                self._watchlists[key].update(
+                    meta=_metadata(meta), fingerprint=fingerprint, stale=False
+                )
+                self._aliases.update(_aliases(meta, key))
+            refreshed.append(meta)
+        with self._lock:
+            for key in list(self._watchlists):
+                if key not in seen:
+                    self._drop(key)
+        self.save()
+        return refreshed
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                key: {
+                    "meta": watchlist["meta"],
+                    "fingerprint": watchlist["fingerprint"],
+                    "stale": watchlist["stale"],
+                    "urns": sorted(watchlist["urns"]),
+                }
+                for key, watchlist in self._watchlists.items()
+            }
+            # under the lock, concurrent add / remove calls share the tmp file
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+    # in place updates, called by HarmonicClient, saved at once so a restarted
+    # mirror does not trust a file that misses them
+    def added(self, watchlist_id, urns):
+        with self._lock:
+            key = self._aliases.get(str(watchlist_id))
+            if key is None:
+                return
+            watchlist = self._watchlists[key]
+            for urn in urns:
+                watchlist["urns"].add(urn)
+                self._index.setdefault(urn, set()).add(key)
+        self.save()
+
+    def removed(self, watchlist_id, urns):
+        with self._lock:
+            key = self._aliases.get(str(watchlist_id))
+            if key is None:
+                return
+            watchlist = self._watchlists[key]
+            for urn in urns:
+                watchlist["urns"].discard(urn)
+                keys = self._index.get(urn)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._index[urn]
+        self.save()
+
+    def updated(self, watchlist_id, urns=None, **meta):
+        with self._lock:
+            key = self._aliases.get(str(watchlist_id))
+            if key is None:
+                return
+            if urns is not None:
+                self._set_members(key, urns)
+            watchlist = self._watchlists[key]
+            watchlist["meta"].update(meta)
+            # the listing shows the new metadata, refresh() has nothing to download
+            watchlist["fingerprint"] = _fingerprint(watchlist["meta"])
+        self.save()
+
+    def mark_stale(self, watchlist_id):
+        with self._lock:
+            key = self._aliases.get(str(watchlist_id))
+            if key is not None:
+                self._watchlists[key]["stale"] = True
+        self.save()
+
+    def deleted(self, watchlist_id):
+        with self._lock:
+            key = self._aliases.get(str(watchlist_id))
+            if key is not None:
+                self._drop(key)
+        self.save()
+
+    def _set_members(self, key, urns):
+        watchlist = self._watchlists.setdefault(
+            key, {"meta": {}, "fingerprint": None, "stale": False, "urns": set()}
+        )
+        for urn in watchlist["urns"]:
+            keys = self._index.get(urn)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[urn]
+        watchlist["urns"] = set(urns)
+        for urn in watchlist["urns"]:
+            self._index.setdefault(urn, set()).add(key)
+
+    def _drop(self, key):
+        self._set_members(key, [])
+        del self._watchlists[key]
+        for alias in [alias for alias, k in self._aliases.items() if k == key]:
+            del self._aliases[alias]
+
+    def _load(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        for key, watchlist in data.items():
+            self._set_members(key, watchlist["urns"])
+            self._watchlists[key].update(
+                meta=watchlist["meta"],
+                fingerprint=watchlist["fingerprint"],
+                stale=watchlist["stale"],
+            )
+            self._aliases.update(_aliases(watchlist["meta"], key))
+
+
+def _watchlist_key(meta):
+    return meta.get("entity_urn") or str(meta["id"])
+
+
+def _aliases(meta, key):
+    aliases = {key: key}
+    for field in ("id", "entity_urn"):
+        if meta.get(field) is not None:
+            aliases[str(meta[field])] = key
+    return aliases
+
+
+def _metadata(meta):
+    return {k: v for k, v in meta.items() if k != "companies"}
+
+
+def _fingerprint(meta):
+    data = json.dumps(_metadata(meta), sort_keys=True, default=str).encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
@@ -1,8 +1,9 @@
 from harmonic.api import HarmonicClient
 import argparse
+import logging
 
 
-def company_summary(company, client):
+def company_summary(company):
     summary_template = """
     company: {}
         website: {}
@@ -16,12 +17,11 @@ def company_summary(company, client):
     headcount = company["headcount"]
     funding_stage = company["funding"]["funding_stage"]
     investors = [investor["name"] for investor in company["funding"]["investors"]]
-    people_full = client.get_persons_by_ids(
-        [bio["person"] for bio in company["people"]], isURN=True
-    )
+    # person records attached by client.hydrate_companies
     people = [
-        (person["full_name"], person["socials"]["LINKEDIN"]["url"])
-        for person in people_full
+        (bio["person_record"]["full_name"], bio["person_record"]["socials"]["LINKEDIN"]["url"])
+        for bio in company["people"]
+        if bio.get("person_record") is not None
     ]
     return summary_template.format(
         name, website, headcount, funding_stage, investors, people
@@ -32,6 +32,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--apikey", type=str, required=True, help="HARMONIC API KEY")
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     client = HarmonicClient(args.apikey)
 
@@ -47,9 +48,13 @@ if __name__ == "__main__":
     print(f"keywords: {keywords}")
     print(f"total: {keyword_serach_res['count']}")
     companies = client.get_companies_by_ids(keyword_serach_res["results"], isURN=True)
+    # one bulk person lookup for the whole page instead of one per company
+    companies = client.hydrate_companies(
+        [company for company in companies if company is not None], include=["people"]
+    )
     print("first page matched company summaries")
     for company in companies:
-        print(company_summary(company, client))
+        print(company_summary(company))
 
     # show my saved searches
     print("----- SAVED SEARCHES -----")
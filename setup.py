@@ -13,7 +13,15 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/harmonicai/consumer_api_sdk.git",
     install_requires=["requests"],
+    extras_require={
+        "async": ["aiohttp"],
+        "zstd": ["zstandard"],
+        "columnar": ["numpy"],
+        "otel": ["opentelemetry-api"],
+        "lazy": ["msgspec"],
+    },
     packages=setuptools.find_packages(),
+    entry_points={"console_scripts": ["harmonic=harmonic.cli:main"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,67 @@
+import pytest
+
+from harmonic.canonical import canonicalize_url, group_by_entity, url_key
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("https://uk.linkedin.com/company/Acme/about/?trk=x", "linkedin.com/company/acme"),
+        ("https://mobile.twitter.com/acme/status/1", "https://x.com/ACME/"),
+        ("https://twitter.com/#!/acme", "twitter.com/acme"),
+        ("http://m.facebook.com/Acme#about", "https://www.facebook.com/acme"),
+        (
+            "https://www.facebook.com/profile.php?id=111&ref=br_rs",
+            "facebook.com/profile.php?ref=x&id=111",
+        ),
+        ("https://www.Acme.com/about?utm=1", "acme.com"),
+        ("https://github.com/acme/", "HTTPS://GitHub.com/acme"),
+        ("https://www.linkedin.com/in/John-Doe", "linkedin.com/in/john-doe/"),
+    ],
+)
+def test_same_entity(a, b):
+    assert canonicalize_url(a, "website_url") == canonicalize_url(b, "website_url")
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("https://www.facebook.com/profile.php?id=111", "https://www.facebook.com/profile.php?id=222"),
+        ("https://www.facebook.com/pages/Acme/111", "https://www.facebook.com/pages/Other/222"),
+        ("https://www.facebook.com/groups/acme", "https://www.facebook.com/groups/other"),
+        ("https://twitter.com/#!/acme1", "https://twitter.com/#!/acme2"),
+        ("https://www.linkedin.com/pub/john-doe/1/23/456", "https://www.linkedin.com/pub/jane-doe/7/89/012"),
+        ("https://www.linkedin.com/profile/view?id=1", "https://www.linkedin.com/profile/view?id=2"),
+        ("https://github.com/acme1", "https://github.com/acme2"),
+        ("https://medium.com/@acme1", "https://medium.com/@acme2"),
+        ("https://www.youtube.com/channel/UCabcDEF", "https://www.youtube.com/channel/UCABCdef"),
+        ("https://github.com/Acme", "https://github.com/acme"),
+        ("https://play.google.com/store/apps/details?id=com.acme1", "https://play.google.com/store/apps/details?id=com.acme2"),
+    ],
+)
+def test_distinct_entities(a, b):
+    assert canonicalize_url(a, "website_url") != canonicalize_url(b, "website_url")
+
+
+def test_website_on_profile_site_keeps_path():
+    assert url_key("website_url", "https://linkedin.com/company/acme1") != url_key(
+        "website_url", "https://linkedin.com/company/acme2"
+    )
+
+
+def test_group_by_entity():
+    groups = group_by_entity(
+        [
+            "https://www.facebook.com/profile.php?id=111",
+            "https://www.facebook.com/profile.php?id=222",
+            "facebook.com/profile.php?id=111&sk=about",
+            "https://github.com/acme1",
+            "https://github.com/acme2",
+        ]
+    )
+    assert list(groups.values()) == [
+        ["https://www.facebook.com/profile.php?id=111", "facebook.com/profile.php?id=111&sk=about"],
+        ["https://www.facebook.com/profile.php?id=222"],
+        ["https://github.com/acme1"],
+        ["https://github.com/acme2"],
+    ]
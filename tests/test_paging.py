@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.mock_server import MockHarmonicServer
+from harmonic.api import HarmonicClient
+from harmonic.paging import AdaptivePageSize
+
+
+@pytest.mark.parametrize("results, max_page_size", [(3000, 200), (1234, 100), (3000, 30), (3, 1000), (0, 1000)])
+@pytest.mark.parametrize("prefetch", [0, 4])
+def test_adaptive_paging_follows_the_server_page_cap(results, max_page_size, prefetch):
+    with MockHarmonicServer(results=results, max_page_size=max_page_size) as server:
+        client = HarmonicClient("key")
+        client._set_api_endpoint(server.url)
+        sizer = AdaptivePageSize()
+        ids = [
+            record["id"]
+            for record in client.iter_saved_search_results(1, adaptive=sizer, prefetch=prefetch)
+        ]
+        client.close()
+    assert ids == list(range(results))
+    assert sizer.max_size <= max(max_page_size, sizer.min_size)
@@ -0,0 +1,88 @@
+import json
+import random
+
+import pytest
+
+from harmonic.streaming import JSONArrayScanner, iter_json_array
+
+STRINGS = ["", 'a"b\\c', "x,y]}{[", "ünïcødé ✓", '\\"', "\n\t", "results", '"results": [']
+KEYS = ["a", 'b"', "c,", "[d", "results", "{e}"]
+
+
+def random_value(rnd, depth=0):
+    r = rnd.random()
+    if depth > 3 or r < 0.3:
+        return rnd.choice([1, -2.5e3, None, True, *STRINGS])
+    if r < 0.65:
+        return {
+            rnd.choice(KEYS) + str(i): random_value(rnd, depth + 1)
+            for i in range(rnd.randint(0, 4))
+        }
+    return [random_value(rnd, depth + 1) for _ in range(rnd.randint(0, 4))]
+
+
+def random_chunks(rnd, raw):
+    """raw split in chunks of 1 to 8 bytes, cutting through strings, escapes and code points"""
+    chunks = []
+    start = 0
+    while start < len(raw):
+        end = start + rnd.randint(1, 8)
+        chunks.append(raw[start:end])
+        start = end
+    return chunks
+
+
+def document(rnd, items, keyed):
+    doc = (
+        {"count": len(items), "meta": {"results": [1, 2]}, "results": items, "after": ["x"]}
+        if keyed
+        else items
+    )
+    return json.dumps(
+        doc, ensure_ascii=rnd.random() < 0.5, indent=rnd.choice([None, 1])
+    ).encode()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_random_documents(seed):
+    rnd = random.Random(seed)
+    for _ in range(100):
+        items = [random_value(rnd) for _ in range(rnd.randint(0, 6))]
+        keyed = rnd.random() < 0.7
+        raw = document(rnd, items, keyed)
+        chunks = random_chunks(rnd, raw)
+        assert list(iter_json_array(chunks, key="results" if keyed else None)) == items, raw
+
+
+@pytest.mark.parametrize(
+    "raw, items",
+    [
+        (b'{"results": []}', []),
+        (b'{"count": 0, "results": [], "after": [{"a": 1}]}', []),
+        (b'{"x": "results", "results": [1]}', [1]),
+        (b'{"x": ["results"], "results": [1]}', [1]),
+        (b'{"a": "\\"results\\": [1]", "results": [2]}', [2]),
+        (b'{"meta": {"results": [1]}, "results": [2, 3]}', [2, 3]),
+        (b'{"results": ["]", "[", "}", "{", ",", "\\\\", "\\""]}', ["]", "[", "}", "{", ",", "\\", '"']),
+        (b'{"results": [{"a": [1, {"b": "]}"}]}, [], {}, null]}', [{"a": [1, {"b": "]}"}]}, [], {}, None]),
+        ('{"results": ["é✓"]}'.encode(), ["é✓"]),
+    ],
+)
+def test_regressions(raw, items):
+    for size in range(1, 9):
+        chunks = [raw[i : i + size] for i in range(0, len(raw), size)]
+        assert list(iter_json_array(chunks)) == items
+
+
+def test_feed_returns_element_bytes():
+    scanner = JSONArrayScanner(key=None)
+    raw = b'[{"a": "x,y"}, [1, 2], "s"]'
+    elements = [element for i in range(len(raw)) for element in scanner.feed(raw[i : i + 1])]
+    assert [json.loads(element) for element in elements] == [{"a": "x,y"}, [1, 2], "s"]
+    assert scanner.done
+
+
+@pytest.mark.parametrize("raw", [b'{"results": [1, 2', b'{"results": "results"}', b'{"count": 0}'])
+def test_incomplete_or_missing_array(raw):
+    with pytest.raises(ValueError):
+        list(iter_json_array([raw]))